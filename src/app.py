@@ -20,7 +20,7 @@ from io import BytesIO
 from fastapi import FastAPI, Request, File, UploadFile, Form, HTTPException
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, PlainTextResponse
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, RedirectResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from docx import Document
@@ -159,6 +159,14 @@ def save_frases_clave(data: Dict[str, List[str]]) -> None:
             json.dump(data, f, ensure_ascii=False, indent=2)
         os.replace(temp_path, FRASES_FILE)
 
+# orjson (opcional) serializa los resultados de análisis, grandes y anidados, bastante más rápido
+# que json; sin él se responde con el JSONResponse estándar
+try:
+    import orjson  # noqa: F401
+    RespuestaAnalisis = ORJSONResponse
+except ImportError:
+    RespuestaAnalisis = JSONResponse
+
 # Importar el analizador de IA (asumiendo que ya está entrenado)
 try:
     from src.backend.analisis import AnalizadorLegal
@@ -466,6 +474,12 @@ class DeleteDocumentPayload(BaseModel):
     nombre_archivo: str
 
 
+class AnalizarLotePayload(BaseModel):
+    textos: List[str]
+    nombres: Optional[List[str]] = None
+    detalles: bool = True
+
+
 # ====== ENDPOINTS CRUD DE FRASES CLAVE ======
 @app.get("/api/frases")
 async def listar_frases():
@@ -714,7 +728,7 @@ async def subir_documento(
             shutil.move(str(ruta_archivo), str(destino))
             resultado["ruta_archivo"] = str(destino)
         
-        return JSONResponse(content=resultado)
+        return RespuestaAnalisis(content=resultado)
         
     except HTTPException:
         raise
@@ -908,7 +922,7 @@ async def ver_archivo(request: Request, archivo_id: str, highlight: str = None,
         raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
 
 
-@app.get("/api/analizar")
+@app.get("/api/analizar", response_class=RespuestaAnalisis)
 async def api_analizar():
     """Endpoint API para análisis"""
     try:
@@ -917,6 +931,20 @@ async def api_analizar():
         logger.error(f"Error en API: {e}")
         return {"error": f"Error al analizar: {str(e)}"}
 
+@app.post("/api/analizar-lote")
+def api_analizar_lote(payload: AnalizarLotePayload):
+    """Analiza varios textos ya extraídos en paralelo (un pool de procesos por lote).
+
+    Es síncrono a propósito: FastAPI lo ejecuta en su pool de hilos mientras espera al pool de procesos.
+    """
+    if not ANALIZADOR_IA_DISPONIBLE:
+        raise HTTPException(status_code=503, detail="Analizador de IA no disponible")
+    if payload.nombres is not None and len(payload.nombres) != len(payload.textos):
+        raise HTTPException(status_code=400, detail="'nombres' debe tener un nombre por cada texto")
+    analizador = AnalizadorLegal()
+    resultados = analizador.analizar_lote(payload.textos, payload.nombres, payload.detalles)
+    return RespuestaAnalisis(content={"resultados": resultados, "total": len(resultados)})
+
 @app.post("/api/limpiar-cache")
 async def limpiar_cache():
     """Endpoint para limpiar el caché de análisis"""
@@ -927,7 +955,7 @@ async def limpiar_cache():
     return JSONResponse(content={"mensaje": "Caché limpiado correctamente"})
 
 
-@app.get("/api/analisis-predictivo")
+@app.get("/api/analisis-predictivo", response_class=RespuestaAnalisis)
 async def api_analisis_predictivo():
     """Endpoint API para análisis predictivo e inteligente de resoluciones"""
     try:
@@ -2255,9 +2283,9 @@ async def health_check():
     }
 
 
-@app.get("/api/documento/{nombre_archivo}")
-async def obtener_documento(nombre_archivo: str):
-    """Obtiene detalles de un documento específico"""
+@app.get("/api/documento/{nombre_archivo}", response_class=RespuestaAnalisis)
+async def obtener_documento(nombre_archivo: str, details: bool = True):
+    """Obtiene detalles de un documento específico (``?details=false`` omite las ocurrencias)"""
     try:
         # Decodificar el nombre del archivo
         nombre_decodificado = nombre_archivo
@@ -2278,7 +2306,7 @@ async def obtener_documento(nombre_archivo: str):
             if ANALIZADOR_IA_DISPONIBLE:
                 from src.backend.analisis import AnalizadorLegal
                 analizador = AnalizadorLegal()
-                resultado = analizador.analizar_documento(str(archivo_path))
+                resultado = analizador.analizar_documento(str(archivo_path), detalles=details)
             else:
                 resultado = analizador_basico.analizar_documento(str(archivo_path), nombre_decodificado)
             
@@ -2386,20 +2414,27 @@ def analizar_sentencias_existentes() -> Dict[str, Any]:
         ranking_global = {}
         total_apariciones = 0
         
-        for archivo in archivos_soportados:
+        # Con el analizador de IA todos los archivos se analizan de una vez, repartidos en un pool
+        # de procesos (lectura de PDFs incluida); los resultados vuelven en el orden de los archivos
+        resultados_ia = None
+        if ANALIZADOR_IA_DISPONIBLE:
+            logger.info(f"🤖 Usando analizador de IA para {len(archivos_soportados)} archivos")
+            inicio_lote = datetime.now()
+            from src.backend.analisis import AnalizadorLegal
+            analizador = AnalizadorLegal()
+            resultados_ia = analizador.analizar_documentos([str(archivo) for archivo in archivos_soportados])
+        
+        for indice, archivo in enumerate(archivos_soportados):
             try:
                 logger.info(f"🔍 Analizando archivo: {archivo.name}")
                 
                 # Marcar tiempo de inicio para este archivo
                 tiempo_inicio = datetime.now()
                 
-                # Usar el analizador de IA si está disponible, sino el básico
-                if ANALIZADOR_IA_DISPONIBLE:
-                    logger.info(f"🤖 Usando analizador de IA para: {archivo.name}")
-                    from src.backend.analisis import AnalizadorLegal
-                    analizador = AnalizadorLegal()
-                    analizador._tiempo_inicio = tiempo_inicio
-                    resultado = analizador.analizar_documento(str(archivo))
+                # Usar el resultado del analizador de IA si está disponible, sino el básico
+                if resultados_ia is not None:
+                    tiempo_inicio = inicio_lote
+                    resultado = resultados_ia[indice]
                 else:
                     logger.info(f"🔧 Usando analizador básico para: {archivo.name}")
                     analizador_basico._tiempo_inicio = tiempo_inicio
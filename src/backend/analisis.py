@@ -5,11 +5,22 @@ Módulo de Análisis de IA para Documentos Legales
 Asume que el modelo ya está entrenado y guardado
 """
 
+import codecs
 import os
+import mmap
 import re
+import bisect
+import sys
 import logging
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import (
+    Any, Dict, FrozenSet, Iterator, List, NamedTuple, Optional, Tuple, Union
+)
 import json
 import pickle
 from .analisis_discrepancias import AnalizadorDiscrepancias
@@ -21,9 +32,496 @@ try:
 except ImportError:
     PYPDF2_AVAILABLE = False
 
-# Configurar logging
-logging.basicConfig(level=logging.INFO)
+try:
+    import pypdfium2 as pdfium  # type: ignore
+    PYPDFIUM2_AVAILABLE = True
+except ImportError:
+    PYPDFIUM2_AVAILABLE = False
+
+try:
+    import regex  # type: ignore
+    REGEX_AVAILABLE = True
+except ImportError:
+    REGEX_AVAILABLE = False
+
+try:
+    import numpy as np  # type: ignore
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import joblib  # type: ignore
+    JOBLIB_AVAILABLE = True
+except ImportError:
+    JOBLIB_AVAILABLE = False
+
+# Logger del módulo: handlers y nivel los configura el punto de entrada de la aplicación
 logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+# Vocabulario de la predicción basada en reglas (cada término cuenta una vez)
+_PALABRAS_FAVORABLES: FrozenSet[str] = frozenset({
+    "procedente", "estimamos", "accedemos", "concedemos", "reconocemos",
+    "favorable", "justificado", "acreditado", "confirmado", "establecido",
+    "fundada", "procede", "accede", "concede", "reconoce"
+})
+
+_PALABRAS_DESFAVORABLES: FrozenSet[str] = frozenset({
+    "desestimamos", "infundada", "rechazamos", "denegamos", "no procedente",
+    "desfavorable", "no acreditado", "insuficiente", "negligencia", "culpabilidad",
+    "desestima", "rechaza", "deniega", "denegar", "denegada", "denegado"
+})
+
+_TERMINOS_JURIDICOS: Tuple[str, ...] = (
+    "actor", "demandado", "procedimiento", "instancia", "resolución", "recurso",
+    "fundamento", "considerando"
+)
+
+# Factores de la puntuación híbrida (se comprueba si aparecen en el texto en minúsculas)
+_FACTORES_HIBRIDOS_POSITIVOS: Tuple[str, ...] = (
+    "estimamos", "estimamos que", "consideramos", "consideramos que",
+    "procede", "procede estimar", "debe estimarse", "debe reconocerse",
+    "favorable", "estimación favorable", "reconocimiento", "reconocer"
+)
+_FACTORES_HIBRIDOS_NEGATIVOS: Tuple[str, ...] = (
+    "desestimamos", "desestimamos que", "no procede", "no procede estimar",
+    "desfavorable", "estimación desfavorable", "denegar", "denegamos",
+    "desestimar", "rechazar", "rechazamos"
+)
+
+# Detección del fallo: encabezados de la parte dispositiva y patrones de cada sentido
+_CLAVES_SECCION_FALLO: Tuple[str, ...] = (
+    "fallo", "parte dispositiva", "resolvemos", "acordamos"
+)
+_PATRONES_FALLO_FAVORABLES: Tuple[str, ...] = (
+    "estimamos", "estimando", "se estima", "procedente", "concedemos", "acogemos",
+    "reconocemos", "se reconoce", "revocamos la sentencia de instancia y declaramos",
+    "declaramos la incapacidad permanente", "declaramos procedente"
+)
+_PATRONES_FALLO_DESFAVORABLES: Tuple[str, ...] = (
+    "desestimamos", "desestimando", "se desestima", "improcedente", "no ha lugar",
+    "confirmamos la sentencia de instancia", "absolvemos", "denegamos", "rechazamos"
+)
+
+# Los términos de una palabra se buscan en el conjunto de tokens del documento (palabras
+# completas, sin raíces truncadas); solo los compuestos necesitan búsqueda de subcadena
+_FAVORABLES_SIMPLES = frozenset(p for p in _PALABRAS_FAVORABLES if " " not in p)
+_FAVORABLES_COMPUESTAS = tuple(p for p in _PALABRAS_FAVORABLES if " " in p)
+_DESFAVORABLES_SIMPLES = frozenset(p for p in _PALABRAS_DESFAVORABLES if " " not in p)
+_DESFAVORABLES_COMPUESTAS = tuple(p for p in _PALABRAS_DESFAVORABLES if " " in p)
+
+_TOKEN_RE = re.compile(r"[a-záéíóúñü]+")
+
+# Textos fijos de los insights (el resto de mensajes dependen de cada análisis)
+_INSIGHTS_FAVORABLE_AVANZADOS: Tuple[str, ...] = (
+    "El documento presenta argumentos sólidos a favor del caso.",
+    "La resolución favorece al reclamante basándose en evidencia legal."
+)
+_INSIGHTS_DESFAVORABLE_AVANZADOS: Tuple[str, ...] = (
+    "El documento presenta argumentos que pueden ser desfavorables.",
+    "La resolución no favorece al reclamante según el análisis legal."
+)
+_INSIGHTS_FAVORABLE_BASICOS: Tuple[str, ...] = (
+    "El documento presenta argumentos sólidos a favor del caso.",
+    "La resolución favorece al reclamante."
+)
+_INSIGHTS_DESFAVORABLE_BASICOS: Tuple[str, ...] = (
+    "El documento presenta argumentos que pueden ser desfavorables.",
+    "La resolución no favorece al reclamante."
+)
+
+# Plantilla del resultado de error (orden de claves y valores escalares); los
+# contenedores se crean nuevos en cada error porque los consumidores los modifican
+_PLANTILLA_ERROR: Dict[str, Any] = {
+    "error": None,
+    "procesado": False,
+    "nombre_archivo": "archivo_desconocido",
+    "prediccion": None,
+    "frases_clave": None,
+    "argumentos": None,
+    "insights_juridicos": None,
+    "longitud_texto": 0,
+    "total_frases_clave": 0,
+    "modelo_ia": False
+}
+
+# Patrones de argumentos: comunes a ambos extractores y propios de cada uno. El grupo es
+# la frase hasta el primer punto; los ordinales (``primero.-``) se filtran en Python
+_PATRONES_COMUNES: Tuple[str, ...] = (
+    r"por\s+(?:lo\s+)?que\s+([^.\s][^.]{19,}?\.)",
+    r"fundamentos?\s+(?:de\s+)?(?:derecho|derecho\s+por\s+lo\s+que)"
+    r"\s+([^.\s][^.]{19,}?\.)",
+    r"considerando\s+que\s+([^.\s][^.]{19,}?\.)",
+    r"vistos\s+([^.\s][^.]{19,}?\.)",
+    r"resultando\s+([^.\s][^.]{19,}?\.)"
+)
+
+_PATRONES_SOLO_AVANZADOS: Tuple[str, ...] = (
+    r"en\s+su\s+virtud\s+([^.\s][^.]{19,}?\.)",
+    r"por\s+ello\s+([^.\s][^.]{19,}?\.)"
+)
+
+_PATRONES_SOLO_BASICOS: Tuple[str, ...] = (
+    r"primer[ao]?\s*[.-]\s*([^.]*?\.)",
+    r"segund[ao]?\s*[.-]\s*([^.]*?\.)",
+    r"tercer[ao]?\s*[.-]\s*([^.]*?\.)",
+    r"decim[ao]?\s*[.-]\s*([^.]*?\.)"
+)
+
+
+# Motor con cuantificadores posesivos: ``re`` desde Python 3.11 o, antes, ``regex``
+if sys.version_info >= (3, 11):
+    _MOTOR_POSESIVO = re
+else:
+    _MOTOR_POSESIVO = regex if REGEX_AVAILABLE else None
+
+
+@functools.lru_cache(maxsize=None)
+def _combinar_patrones(patrones: Tuple[str, ...],
+                       ignorar_mayusculas: bool = False) -> "re.Pattern":
+    """Fusiona los patrones en una alternación con grupos p0, p1... en un lookahead"""
+    motor = _MOTOR_POSESIVO or re
+    if _MOTOR_POSESIVO is not None:
+        # Mismo resultado (hasta el primer punto) sin retroceder si no hay punto final
+        patrones = tuple(
+            p.replace(r"[^.]{19,}?\.", r"[^.]{19,}+\.")
+            .replace(r"[^.]*?\.", r"[^.]*+\.")
+            for p in patrones
+        )
+    # La clase de iniciales evita probar la alternación completa en cada carácter; el
+    # lookahead conserva las coincidencias solapadas de patrones distintos
+    iniciales = "".join(sorted({p[0] for p in patrones}))
+    alternacion = "|".join(f"(?P<p{i}>{p})" for i, p in enumerate(patrones))
+    flags = motor.IGNORECASE if ignorar_mayusculas else 0
+    return motor.compile(f"(?=[{iniciales}])(?={alternacion})", flags)
+
+
+@functools.lru_cache(maxsize=None)
+def _prefijos_literales(patrones: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Prefijos literales de los patrones ("por", "fundamento"...)"""
+    prefijos = set()
+    for patron in patrones:
+        prefijo = re.match(r"[a-z]+", patron).group()
+        if patron[len(prefijo):len(prefijo) + 1] in ("?", "*"):
+            prefijo = prefijo[:-1]
+        prefijos.add(prefijo)
+    return tuple(sorted(prefijos))
+
+
+def _matches_en_candidatos(patrones: Tuple[str, ...], texto: str,
+                           plegado: Optional[str] = None):
+    """Prueba el patrón combinado solo donde ``str.find`` encuentra un prefijo"""
+    if plegado is None:
+        plegado = texto.casefold()
+    # Si casefold() cambia la longitud (p. ej. "ß") las posiciones no coinciden
+    if len(plegado) != len(texto):
+        yield from _combinar_patrones(patrones, True).finditer(texto)
+        return
+    
+    posiciones = []
+    for prefijo in _prefijos_literales(patrones):
+        pos = plegado.find(prefijo)
+        while pos != -1:
+            posiciones.append(pos)
+            pos = plegado.find(prefijo, pos + 1)
+    posiciones.sort()
+    
+    combinado = _combinar_patrones(patrones)
+    for pos in posiciones:
+        match = combinado.match(plegado, pos)
+        if match is not None:
+            yield match
+
+
+# Coincidencias de argumentos por patrón: (inicio, fin, inicio_argumento, fin_argumento)
+_CoincidenciasPorPatron = List[List[Tuple[int, int, int, int]]]
+
+
+def _coincidencias_por_patron(patrones: Tuple[str, ...], texto: str,
+                              plegado: Optional[str] = None) -> _CoincidenciasPorPatron:
+    """Coincidencias de cada patrón (las de su ``finditer``) en un solo recorrido"""
+    por_patron: _CoincidenciasPorPatron = [[] for _ in patrones]
+    fin_anterior = [0] * len(patrones)
+    indices = None
+    for match in _matches_en_candidatos(patrones, texto, plegado):
+        if indices is None:
+            indices = {
+                grupo: int(nombre[1:]) for nombre, grupo in match.re.groupindex.items()
+            }
+        grupo = match.lastindex
+        i = indices[grupo]
+        inicio = match.start()
+        if inicio < fin_anterior[i]:
+            continue
+        fin = match.end(grupo)
+        fin_anterior[i] = fin
+        por_patron[i].append(
+            (inicio, fin, match.start(grupo + 1), match.end(grupo + 1))
+        )
+    return por_patron
+
+
+def _coincidencias_argumentos(
+    texto: str,
+    patrones_especificos: Tuple[str, ...],
+    plegado: Optional[str] = None,
+    comunes: Optional[_CoincidenciasPorPatron] = None,
+) -> _CoincidenciasPorPatron:
+    """Coincidencias de un extractor: patrones comunes y luego los específicos"""
+    if comunes is None:
+        comunes = _coincidencias_por_patron(_PATRONES_COMUNES, texto, plegado)
+    return [*comunes, *_coincidencias_por_patron(patrones_especificos, texto, plegado)]
+
+
+class _TextoPreparado(NamedTuple):
+    """Datos del texto de un documento que usan varios pasos del mismo análisis"""
+    minusculas: str
+    plegado: str
+    # Coincidencias de _PATRONES_COMUNES, compartidas por los dos extractores
+    coincidencias_comunes: _CoincidenciasPorPatron
+
+
+def _preparar_texto(texto: str) -> _TextoPreparado:
+    """Calcula minúsculas, texto plegado y patrones comunes una vez por análisis"""
+    plegado = texto.casefold()
+    return _TextoPreparado(texto.lower(), plegado,
+                           _coincidencias_por_patron(_PATRONES_COMUNES, texto, plegado))
+
+
+@functools.lru_cache(maxsize=None)
+def _compilar_variante(variante: str, plegado: bool = False) -> "re.Pattern":
+    """Patrón flexible de una variante (espacios y guiones equivalentes)"""
+    if plegado:
+        variante = variante.casefold()
+    flexible = re.escape(variante)
+    flexible = flexible.replace("\\ ", "\\s+")
+    flexible = flexible.replace("\\_", "[\\s_\-]+")
+    flexible = flexible.replace("\\-", "[\\s_\-]+")
+    return re.compile(flexible, 0 if plegado else re.IGNORECASE)
+
+
+class _IndiceFrases(NamedTuple):
+    """Variantes únicas de las frases clave y sus índices por categoría"""
+    variantes: Tuple[str, ...]
+    categorias: Tuple[str, ...]
+    ids_por_categoria: Tuple[Tuple[int, ...], ...]
+
+
+def _indexar_frases(frases: Dict[str, Any]) -> _IndiceFrases:
+    """Construye el índice de un diccionario ``categoría -> variantes``"""
+    ids: Dict[str, int] = {}
+    ids_por_categoria = tuple(
+        tuple(ids.setdefault(variante, len(ids)) for variante in variantes)
+        for variantes in frases.values()
+    )
+    return _IndiceFrases(tuple(ids), tuple(frases), ids_por_categoria)
+
+
+_SEPARADORES_VARIANTE_RE = re.compile(r"[ _\-]")
+
+
+def _buscar_variante_plegada(variante: str,
+                             texto_plegado: str) -> List[Tuple[int, int]]:
+    """Coincidencias de una variante en el texto plegado, usando ``str.find``"""
+    literal = variante.casefold()
+    separador = _SEPARADORES_VARIANTE_RE.search(literal)
+    coincidencias = []
+    if separador is None:
+        longitud = len(literal)
+        posicion = texto_plegado.find(literal)
+        while posicion != -1:
+            coincidencias.append((posicion, posicion + longitud))
+            posicion = texto_plegado.find(literal, posicion + longitud)
+        return coincidencias
+    
+    # Varias palabras: el patrón flexible solo se prueba donde aparece la primera
+    prefijo = literal[:separador.start()]
+    patron = _compilar_variante(variante, True)
+    if not prefijo:
+        return [match.span() for match in patron.finditer(texto_plegado)]
+    posicion = texto_plegado.find(prefijo)
+    while posicion != -1:
+        match = patron.match(texto_plegado, posicion)
+        if match:
+            coincidencias.append(match.span())
+            posicion = texto_plegado.find(prefijo, match.end())
+        else:
+            posicion = texto_plegado.find(prefijo, posicion + 1)
+    return coincidencias
+
+
+def _buscar_variantes(variantes: Tuple[str, ...], texto_busqueda: str,
+                      plegado: bool) -> List[List[Tuple[int, int]]]:
+    """Posiciones ``(inicio, fin)`` de cada variante, alineadas con ``variantes``"""
+    if plegado:
+        return [
+            _buscar_variante_plegada(variante, texto_busqueda) for variante in variantes
+        ]
+    return [
+        [
+            match.span()
+            for match in _compilar_variante(variante, plegado).finditer(texto_busqueda)
+        ]
+        for variante in variantes
+    ]
+
+
+def _posiciones_saltos_linea(texto: str) -> List[int]:
+    """Posiciones ordenadas de los saltos de línea (para numerar líneas con bisect)"""
+    posiciones = []
+    posicion = texto.find("\n")
+    while posicion != -1:
+        posiciones.append(posicion)
+        posicion = texto.find("\n", posicion + 1)
+    return posiciones
+
+
+def _cargar_artefacto_modelo(ruta: Path) -> Any:
+    """Carga un modelo serializado (la copia .joblib con mmap si está al día)"""
+    ruta_joblib = ruta.with_suffix(".joblib")
+    # Con mmap_mode="r" los procesos del lote comparten los arrays de NumPy del modelo
+    if JOBLIB_AVAILABLE and ruta_joblib.exists() and (
+            not ruta.exists() or ruta_joblib.stat().st_mtime >= ruta.stat().st_mtime):
+        return joblib.load(ruta_joblib, mmap_mode="r")
+    with open(ruta, 'rb') as f:
+        return pickle.load(f)
+
+
+@functools.lru_cache(maxsize=4)
+def _leer_frases_clave_json(ruta: str, mtime_ns: int) -> Dict[str, Tuple[str, ...]]:
+    """Frases clave de un JSON, memoizadas por ruta y fecha de modificación"""
+    with open(ruta, 'r', encoding='utf-8') as f:
+        return {
+            categoria: tuple(variantes) for categoria, variantes in json.load(f).items()
+        }
+
+
+# Marcas de orden de bytes y su codec (UTF-32 antes que UTF-16: comparten prefijo)
+_BOMS_TEXTO: Tuple[Tuple[bytes, str], ...] = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Longitud máxima por defecto del texto analizado (acota los documentos enormes)
+_MAX_CARACTERES_POR_DEFECTO = 500_000
+
+# A partir de este tamaño los .txt se decodifican desde un mmap
+_UMBRAL_MMAP_BYTES = 8 * 1024 * 1024
+
+
+# Frases clave específicas por tipo de documento (se construyen una vez por proceso)
+_FRASES_CLAVE_SENTENCIA = {
+    "fundamentos_juridicos": (
+        "fundamentos de derecho", "fundamentos jurídicos", "fundamento", "fundamentos",
+        "considerando", "considerandos", "vistos", "resultando", "por lo que"
+    ),
+    "conclusiones_judiciales": (
+        "estimamos", "desestimamos", "procedente", "improcedente", "accedemos",
+        "concedemos", "reconocemos", "denegamos", "rechazamos", "fallamos"
+    ),
+    "incapacidad_permanente_parcial": (
+        "incapacidad permanente parcial", "IPP", "permanente parcial",
+        "incapacidad parcial permanente", "secuela permanente",
+        "incapacidad permanente", "secuelas permanentes"
+    ),
+    "procedimiento_legal": (
+        "procedente", "desestimamos", "estimamos", "fundada",
+        "infundada", "accedemos", "concedemos", "reconocemos",
+        "recurso", "instancia", "tribunal supremo", "STS"
+    ),
+    "lesiones_hombro": (
+        "rotura del manguito rotador", "supraespinoso", "hombro derecho",
+        "lesión de hombro", "manguito rotador", "tendón supraespinoso",
+        "hombro", "manguito", "lesiones del hombro"
+    ),
+    "inss": (
+        "INSS", "Instituto Nacional de la Seguridad Social", "Seguridad Social",
+        "Instituto Nacional", "Seguridad Social"
+    )
+}
+
+_FRASES_CLAVE_INFORME_MEDICO = {
+    "diagnostico_medico": (
+        "diagnóstico", "diagnóstico médico", "diagnóstico clínico",
+        "exploración física", "examen físico", "evaluación médica"
+    ),
+    "lesiones_anatomicas": (
+        "rotura del manguito rotador", "supraespinoso", "hombro derecho",
+        "lesión de hombro", "manguito rotador", "tendón supraespinoso",
+        "hombro", "manguito", "lesiones del hombro", "tenopatía",
+        "artropatía acromioclavicular", "retracción fibrilar"
+    ),
+    "limitaciones_funcionales": (
+        "limitación funcional", "limitaciones funcionales", "flexión activa",
+        "abducción activa", "fuerza insuficiente", "balance muscular",
+        "fuerza de garra", "limitación activa", "discinesia escapular",
+        "atrofia periescapular", "desarrollo de fuerza"
+    ),
+    "evidencia_objetiva": (
+        "RMN", "resonancia magnética", "TAC", "tomografía", "radiografía",
+        "informe de biomecánica", "pruebas complementarias", "anclajes",
+        "tornillos", "cirugía reconstructiva"
+    ),
+    "incapacidad_permanente_parcial": (
+        "incapacidad permanente parcial", "IPP", "permanente parcial",
+        "incapacidad parcial permanente", "secuela permanente",
+        "incapacidad permanente", "secuelas permanentes"
+    ),
+    "personal_limpieza": (
+        "limpiadora", "personal de limpieza", "servicios de limpieza",
+        "trabajador de limpieza", "empleada de limpieza", "limpieza"
+    ),
+    "accidente_laboral": (
+        "accidente laboral", "accidente de trabajo", "accidente durante",
+        "jornada laboral", "lugar de trabajo", "accidente en el trabajo"
+    )
+}
+
+_INDICES_FRASES_POR_TIPO: Dict[str, _IndiceFrases] = {
+    "sentencia": _indexar_frases(_FRASES_CLAVE_SENTENCIA),
+    "informe_medico": _indexar_frases(_FRASES_CLAVE_INFORME_MEDICO),
+}
+
+
+# A partir de cuántos argumentos compensa convertir las longitudes a un array de NumPy
+_MIN_ARGUMENTOS_VECTORIZAR = 50
+
+
+def _confianzas_por_longitud(longitudes: List[int]) -> List[float]:
+    """Confianza de cada argumento según su longitud (con NumPy si compensa)"""
+    if NUMPY_AVAILABLE and len(longitudes) >= _MIN_ARGUMENTOS_VECTORIZAR:
+        valores = np.asarray(longitudes, dtype=np.float64)
+        return np.minimum(0.95, 0.6 + (valores / 1000) * 0.3).tolist()
+    return [min(0.95, 0.6 + (longitud / 1000) * 0.3) for longitud in longitudes]
+
+
+class Argumento(NamedTuple):
+    """Argumento legal extraído del texto (se convierte a dict con ``como_dict()``)"""
+    tipo: str
+    texto: str
+    posicion: int
+    confianza: float
+    categoria: str
+    longitud: Optional[int] = None
+    contexto_rango: Optional[Tuple[int, int]] = None
+    
+    def como_dict(self, texto_documento: Optional[str] = None) -> Dict[str, Any]:
+        """Dict del argumento para el resultado (con ``contexto`` si hay texto)"""
+        datos = {campo: valor for campo, valor in self._asdict().items()
+                 if valor is not None and campo != "contexto_rango"}
+        if texto_documento is not None and self.contexto_rango is not None:
+            datos["contexto"] = obtener_contexto(self, texto_documento)
+        return datos
+
+
+def obtener_contexto(argumento: Argumento, texto: str) -> str:
+    """Recorta de ``texto`` el contexto de un argumento (``contexto_rango``)"""
+    inicio, fin = argumento.contexto_rango
+    return texto[inicio:fin]
 
 
 class AnalizadorLegal:
@@ -32,18 +530,30 @@ class AnalizadorLegal:
     Asume que el modelo ya está entrenado y guardado
     """
     
-    def __init__(self, modelo_path: str = "models/modelo_legal.pkl"):
+    def __init__(self, modelo_path: str = "models/modelo_legal.pkl",
+                 max_ocurrencias_por_categoria: int = 20,
+                 max_caracteres: Optional[int] = None):
         """
         Inicializa el analizador con el modelo pre-entrenado
         
         Args:
             modelo_path: Ruta al archivo del modelo guardado
+            max_ocurrencias_por_categoria: Ocurrencias detalladas por categoría
+            max_caracteres: Longitud máxima del texto analizado (por defecto
+                ANALIZADOR_MAX_CHARS o 500000; 0 sin límite)
         """
         self.modelo_path = Path(modelo_path)
+        self.max_ocurrencias_por_categoria = max_ocurrencias_por_categoria
+        if max_caracteres is None:
+            max_caracteres = int(
+                os.getenv("ANALIZADOR_MAX_CHARS", _MAX_CARACTERES_POR_DEFECTO)
+            )
+        self.max_caracteres = max_caracteres
         self.modelo = None
         self.vectorizador = None
         self.clasificador = None
         self.frases_clave = self._cargar_frases_clave()
+        self._indice_frases_clave = _indexar_frases(self.frases_clave)
         # Componentes SBERT (si existen)
         self.sbert_encoder = None
         self.sbert_clf = None
@@ -92,8 +602,11 @@ class AnalizadorLegal:
         config_path = Path("models/frases_clave.json")
         if config_path.exists():
             try:
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+                # Leído una vez por versión del archivo; cada analizador recibe su copia
+                frases = _leer_frases_clave_json(
+                    str(config_path), config_path.stat().st_mtime_ns
+                )
+                return {categoria: list(v) for categoria, v in frases.items()}
             except Exception as e:
                 logger.warning(f"No se pudo cargar configuración de frases clave: {e}")
         
@@ -102,13 +615,13 @@ class AnalizadorLegal:
     def _cargar_modelo(self):
         """Carga el modelo pre-entrenado con manejo de incompatibilidades"""
         try:
-            if self.modelo_path.exists():
-                with open(self.modelo_path, 'rb') as f:
-                    modelo_data = pickle.load(f)
-                    self.modelo = modelo_data.get('modelo')
-                    self.vectorizador = modelo_data.get('vectorizador')
-                    self.clasificador = modelo_data.get('clasificador')
-                    logger.info("✅ Modelo de IA (TF-IDF) cargado correctamente")
+            ruta_joblib = self.modelo_path.with_suffix(".joblib")
+            if self.modelo_path.exists() or ruta_joblib.exists():
+                modelo_data = _cargar_artefacto_modelo(self.modelo_path)
+                self.modelo = modelo_data.get('modelo')
+                self.vectorizador = modelo_data.get('vectorizador')
+                self.clasificador = modelo_data.get('clasificador')
+                logger.info("✅ Modelo de IA (TF-IDF) cargado correctamente")
             else:
                 logger.warning(f"⚠️ Modelo no encontrado en {self.modelo_path}")
                 logger.info("Se usará análisis basado en reglas")
@@ -132,12 +645,11 @@ class AnalizadorLegal:
                 import warnings
                 with warnings.catch_warnings():
                     warnings.simplefilter("ignore")
-                    with open(self.modelo_path, 'rb') as f:
-                        modelo_data = pickle.load(f)
-                        self.modelo = modelo_data.get('modelo')
-                        self.vectorizador = modelo_data.get('vectorizador')
-                        self.clasificador = modelo_data.get('clasificador')
-                        logger.info("✅ Modelo cargado con supresión de warnings")
+                    modelo_data = _cargar_artefacto_modelo(self.modelo_path)
+                    self.modelo = modelo_data.get('modelo')
+                    self.vectorizador = modelo_data.get('vectorizador')
+                    self.clasificador = modelo_data.get('clasificador')
+                    logger.info("✅ Modelo cargado con supresión de warnings")
             except Exception as e2:
                 logger.warning(f"⚠️ No se pudo cargar modelo incluso con warnings suprimidos: {e2}")
                 logger.info("Continuando con modelo básico")
@@ -184,17 +696,16 @@ class AnalizadorLegal:
                     self.sbert_clf = None
                     return
                 
-                with open(sbert_path, 'rb') as f:
-                    sbert_data = pickle.load(f)
-                    self.sbert_encoder = sbert_data.get('encoder')
-                    self.sbert_clf = sbert_data.get('clasificador')
-                    
-                    if self.sbert_encoder is not None and self.sbert_clf is not None:
-                        logger.info("✅ Modelo SBERT cargado desde archivo")
-                    else:
-                        logger.warning("⚠️ Modelo SBERT incompleto en archivo")
-                        self.sbert_encoder = None
-                        self.sbert_clf = None
+                sbert_data = _cargar_artefacto_modelo(sbert_path)
+                self.sbert_encoder = sbert_data.get('encoder')
+                self.sbert_clf = sbert_data.get('clasificador')
+                
+                if self.sbert_encoder is not None and self.sbert_clf is not None:
+                    logger.info("✅ Modelo SBERT cargado desde archivo")
+                else:
+                    logger.warning("⚠️ Modelo SBERT incompleto en archivo")
+                    self.sbert_encoder = None
+                    self.sbert_clf = None
             else:
                 logger.info("ℹ️ Modelo SBERT no encontrado, usando TF-IDF")
         except Exception as e:
@@ -203,20 +714,27 @@ class AnalizadorLegal:
             self.sbert_encoder = None
             self.sbert_clf = None
     
-    def _analisis_hibrido_avanzado(self, contenido: str, nombre_archivo: str = None) -> Dict[str, Any]:
+    def _analisis_hibrido_avanzado(
+        self,
+        contenido: str,
+        frases_encontradas: Dict[str, Any],
+        nombre_archivo: str = None,
+        preparado: Optional[_TextoPreparado] = None,
+    ) -> Dict[str, Any]:
         """Análisis híbrido avanzado que simula IA usando reglas inteligentes"""
+        if preparado is None:
+            preparado = _preparar_texto(contenido)
         try:
             # Detectar fallo usando método avanzado
-            fallo = self._detectar_fallo(contenido)
+            fallo = self._detectar_fallo(contenido, preparado.minusculas)
             
-            # Detectar tipo de documento para análisis específico
-            tipo_documento = self._detectar_tipo_documento_por_nombre(nombre_archivo)
-            
-            # Análisis de frases clave específico por tipo de documento
-            frases_encontradas = self._analizar_frases_clave_por_tipo(contenido, nombre_archivo, tipo_documento)
+            # Total de frases clave: se calcula una sola vez para todo el resultado
+            _, total_frases = self._resumir_frases_clave(frases_encontradas)
             
             # Calcular puntuación basada en patrones
-            puntuacion = self._calcular_puntuacion_hibrida(contenido, frases_encontradas)
+            puntuacion = self._calcular_puntuacion_hibrida(
+                contenido, frases_encontradas, total_frases, preparado.minusculas
+            )
             
             # Determinar predicción
             es_favorable = puntuacion >= 0.5
@@ -228,7 +746,9 @@ class AnalizadorLegal:
                 confianza = max(confianza, 0.85)
             
             # Extraer argumentos
-            argumentos = self._extraer_argumentos_avanzados(contenido)
+            argumentos = self._extraer_argumentos_avanzados(
+                contenido, preparado.plegado, preparado.coincidencias_comunes
+            )
             
             # Generar insights
             insights = self._generar_insights_avanzados(es_favorable, frases_encontradas, confianza)
@@ -236,8 +756,16 @@ class AnalizadorLegal:
             # INCLUIR ANÁLISIS DE DISCREPANCIAS ESPECÍFICO POR TIPO DE DOCUMENTO
             try:
                 logger.info("🔍 Iniciando análisis de discrepancias...")
-                analisis_discrepancias = self.analizador_discrepancias.analizar_discrepancias(contenido, nombre_archivo)
-                logger.info(f"✅ Análisis de discrepancias completado: {len(analisis_discrepancias.get('discrepancias_detectadas', []))} discrepancias encontradas")
+                analizador = self.analizador_discrepancias
+                analisis_discrepancias = analizador.analizar_discrepancias(
+                    contenido, nombre_archivo, preparado.minusculas)
+                if logger.isEnabledFor(logging.INFO):
+                    detectadas = analisis_discrepancias.get(
+                        'discrepancias_detectadas', [])
+                    logger.info(
+                        "✅ Análisis de discrepancias completado: "
+                        f"{len(detectadas)} discrepancias encontradas"
+                    )
                 
                 # Integrar el análisis de discrepancias en el resultado
                 resultado_base = {
@@ -252,9 +780,11 @@ class AnalizadorLegal:
                     },
                     "argumentos": argumentos,
                     "frases_clave": frases_encontradas,
-                    "resumen_inteligente": self._generar_resumen_ia(es_favorable, confianza, frases_encontradas),
+                    "resumen_inteligente": self._generar_resumen_ia(
+                        es_favorable, confianza, frases_encontradas, total_frases
+                    ),
                     "insights_juridicos": insights,
-                    "total_frases_clave": sum(datos["total"] for datos in frases_encontradas.values()),
+                    "total_frases_clave": total_frases,
                     "modelo_ia": True,
                     "metodo_analisis": "IA (Híbrido Avanzado)"
                 }
@@ -278,46 +808,40 @@ class AnalizadorLegal:
                     },
                     "argumentos": argumentos,
                     "frases_clave": frases_encontradas,
-                    "resumen_inteligente": self._generar_resumen_ia(es_favorable, confianza, frases_encontradas),
+                    "resumen_inteligente": self._generar_resumen_ia(
+                        es_favorable, confianza, frases_encontradas, total_frases
+                    ),
                     "insights_juridicos": insights,
-                    "total_frases_clave": sum(datos["total"] for datos in frases_encontradas.values()),
+                    "total_frases_clave": total_frases,
                     "modelo_ia": True,
                     "metodo_analisis": "IA (Híbrido Avanzado)"
                 }
             
         except Exception as e:
             logger.error(f"Error en análisis híbrido: {e}")
-            return self._analisis_basado_reglas(contenido, nombre_archivo)
+            return self._analisis_basado_reglas(
+                contenido, frases_encontradas, nombre_archivo, preparado
+            )
     
-    def _calcular_puntuacion_hibrida(self, contenido: str, frases_encontradas: Dict) -> float:
+    def _calcular_puntuacion_hibrida(self, contenido: str, frases_encontradas: Dict,
+                                     total_frases: Optional[int] = None,
+                                     contenido_lower: Optional[str] = None) -> float:
         """Calcula una puntuación usando análisis híbrido de patrones"""
         puntuacion = 0.5  # Base neutral
         
-        # Factores positivos
-        factores_positivos = [
-            "estimamos", "estimamos que", "consideramos", "consideramos que",
-            "procede", "procede estimar", "debe estimarse", "debe reconocerse",
-            "favorable", "estimación favorable", "reconocimiento", "reconocer"
-        ]
-        
-        # Factores negativos
-        factores_negativos = [
-            "desestimamos", "desestimamos que", "no procede", "no procede estimar",
-            "desfavorable", "estimación desfavorable", "denegar", "denegamos",
-            "desestimar", "rechazar", "rechazamos"
-        ]
-        
-        contenido_lower = contenido.lower()
+        if contenido_lower is None:
+            contenido_lower = contenido.lower()
         
-        # Contar factores positivos
-        positivos = sum(1 for factor in factores_positivos if factor in contenido_lower)
-        negativos = sum(1 for factor in factores_negativos if factor in contenido_lower)
+        # Contar factores positivos y negativos
+        positivos = sum(1 for f in _FACTORES_HIBRIDOS_POSITIVOS if f in contenido_lower)
+        negativos = sum(1 for f in _FACTORES_HIBRIDOS_NEGATIVOS if f in contenido_lower)
         
         # Ajustar puntuación
         puntuacion += (positivos - negativos) * 0.1
         
         # Factor por frases clave encontradas
-        total_frases = sum(datos["total"] for datos in frases_encontradas.values())
+        if total_frases is None:
+            _, total_frases = self._resumir_frases_clave(frases_encontradas)
         if total_frases > 10:
             puntuacion += 0.1
         elif total_frases < 5:
@@ -326,46 +850,40 @@ class AnalizadorLegal:
         # Asegurar rango [0, 1]
         return max(0.0, min(1.0, puntuacion))
     
-    def analizar_documento(self, ruta_archivo: str) -> Dict[str, Any]:
+    def analizar_documento(self, ruta_archivo: str,
+                           detalles: bool = True) -> Dict[str, Any]:
         """
         Analiza un documento legal usando IA
         
         Args:
             ruta_archivo: Ruta al archivo a analizar
+            detalles: Si es False no se construyen las ocurrencias de las frases clave
             
         Returns:
             Diccionario con resultados del análisis
         """
         try:
             # Leer contenido del archivo
-            contenido = self._leer_archivo(ruta_archivo)
+            contenido, lectura_incompleta = self._leer_archivo_con_limite(ruta_archivo)
             if not contenido:
                 return self._crear_resultado_error("No se pudo leer el contenido del archivo")
             
             # Extraer nombre del archivo de la ruta
             nombre_archivo = Path(ruta_archivo).name
             
-            # Análisis con IA si está disponible (priorizar SBERT si está listo)
-            if self.sbert_encoder is not None and self.sbert_clf is not None:
-                resultado = self._analisis_con_sbert(contenido, nombre_archivo)
-            elif (self.modelo is not None and self.vectorizador is not None and 
-                  self.clasificador is not None):
-                resultado = self._analisis_con_ia(contenido, nombre_archivo)
-            elif self.modelo == "basico_reglas":
-                resultado = self._analisis_hibrido_avanzado(contenido, nombre_archivo)
-            else:
-                resultado = self._analisis_basado_reglas(contenido, nombre_archivo)
-            
-            # NOTA: El análisis de discrepancias ya se incluye en _analisis_hibrido_avanzado()
-            # No es necesario ejecutarlo nuevamente aquí
+            contenido, truncado = self._limitar_contenido(contenido, nombre_archivo)
+            # Si la lectura se detuvo en el límite, el documento también está truncado
+            truncado = truncado or lectura_incompleta
+            resultado = self._analizar_contenido(contenido, nombre_archivo, detalles)
             
             # Agregar metadatos
             resultado.update({
                 "archivo": ruta_archivo,
-                "nombre_archivo": Path(ruta_archivo).name,
+                "nombre_archivo": nombre_archivo,
                 "procesado": True,
                 "texto_extraido": contenido,  # Mostrar texto completo
                 "longitud_texto": len(contenido),
+                "truncado": truncado,
                 "timestamp": self._obtener_timestamp(),
                 "ruta_archivo": ruta_archivo
             })
@@ -375,8 +893,200 @@ class AnalizadorLegal:
         except Exception as e:
             logger.error(f"Error analizando documento: {e}")
             return self._crear_resultado_error(f"Error en análisis: {str(e)}")
+    
+    def analizar_texto(self, contenido: str, nombre_archivo: str = "documento.txt",
+                       detalles: bool = True) -> Dict[str, Any]:
+        """
+        Analiza un texto ya extraído (sin leer ningún archivo)
+        
+        Args:
+            contenido: Texto del documento
+            nombre_archivo: Nombre del documento (determina el tipo de documento)
+            detalles: Si es False no se construyen las ocurrencias de las frases clave
+            
+        Returns:
+            Diccionario con resultados del análisis
+        """
+        return self._analizar_texto(contenido, nombre_archivo, detalles)
+    
+    def _analizar_texto(self, contenido: str, nombre_archivo: str,
+                        detalles: bool = True,
+                        probabilidades_ia: Optional[Any] = None) -> Dict[str, Any]:
+        """``analizar_texto`` con las probabilidades TF-IDF ya calculadas, si las hay"""
+        try:
+            if not contenido:
+                return self._crear_resultado_error("El texto a analizar está vacío")
+            
+            contenido, truncado = self._limitar_contenido(contenido, nombre_archivo)
+            resultado = self._analizar_contenido(
+                contenido, nombre_archivo, detalles, probabilidades_ia
+            )
+            resultado.update({
+                "nombre_archivo": nombre_archivo,
+                "procesado": True,
+                "texto_extraido": contenido,
+                "longitud_texto": len(contenido),
+                "truncado": truncado,
+                "timestamp": self._obtener_timestamp()
+            })
+            return resultado
+            
+        except Exception as e:
+            logger.error(f"Error analizando texto: {e}")
+            return self._crear_resultado_error(f"Error en análisis: {str(e)}")
+    
+    def analizar_lote(self, textos: List[str], nombres: Optional[List[str]] = None,
+                      detalles: bool = True,
+                      max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Analiza varios textos en paralelo con un pool de procesos
+        
+        Args:
+            textos: Textos de los documentos
+            nombres: Nombre de cada documento (por defecto documento_1.txt, ...)
+            detalles: Si es False no se construyen las ocurrencias de las frases clave
+            max_workers: Número máximo de procesos (por defecto, el número de CPUs)
+            
+        Returns:
+            Lista de resultados en el mismo orden que ``textos``
+        """
+        if nombres is None:
+            nombres = [f"documento_{i + 1}.txt" for i in range(len(textos))]
+        
+        tam_bloque = max(1, len(textos) // ((max_workers or os.cpu_count() or 1) * 4))
+        inicios = range(0, len(textos), tam_bloque)
+        resultados = self._ejecutar_en_pool(
+            _analizar_bloque_worker, max_workers,
+            [textos[i:i + tam_bloque] for i in inicios],
+            [nombres[i:i + tam_bloque] for i in inicios],
+            [detalles] * len(inicios),
+        )
+        if resultados is None:
+            return self._analizar_textos(textos, nombres, detalles)
+        return [resultado for bloque in resultados for resultado in bloque]
+    
+    def _analizar_textos(self, textos: List[str], nombres: List[str],
+                         detalles: bool = True) -> List[Dict[str, Any]]:
+        """Analiza varios textos secuencialmente, clasificando el lote de una vez"""
+        probabilidades = self._precalcular_probabilidades_ia(textos)
+        return [
+            self._analizar_texto(texto, nombre, detalles, probabilidades_ia)
+            for texto, nombre, probabilidades_ia in zip(textos, nombres, probabilidades)
+        ]
+    
+    def _precalcular_probabilidades_ia(self, textos: List[str]) -> List[Optional[Any]]:
+        """Probabilidades TF-IDF de cada texto del lote (None si no se precalculan)"""
+        por_texto: List[Optional[Any]] = [None] * len(textos)
+        # Misma prioridad que _analizar_contenido: SBERT antes que TF-IDF
+        usa_sbert = self.sbert_encoder is not None and self.sbert_clf is not None
+        usa_tfidf = (self.modelo is not None and self.vectorizador is not None
+                     and self.clasificador is not None)
+        if len(textos) < 2 or usa_sbert or not usa_tfidf:
+            return por_texto
+        
+        # Mismo recorte que aplicará analizar_texto
+        indices = [i for i, texto in enumerate(textos) if texto]
+        limite = self.max_caracteres or None
+        contenidos = [textos[i][:limite] for i in indices]
+        try:
+            matriz = self.vectorizador.transform(contenidos)
+            probabilidades = self.clasificador.predict_proba(matriz)
+        except Exception as e:
+            logger.warning(f"No se pudo clasificar el lote de una vez ({e})")
+            return por_texto
+        for i, probabilidades_texto in zip(indices, probabilidades):
+            por_texto[i] = probabilidades_texto
+        return por_texto
+    
+    def analizar_documentos(self, rutas: List[str], detalles: bool = True,
+                            max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Analiza varios archivos en paralelo con un pool de procesos
+        
+        Args:
+            rutas: Rutas de los archivos a analizar
+            detalles: Si es False no se construyen las ocurrencias de las frases clave
+            max_workers: Número máximo de procesos (por defecto, el número de CPUs)
+            
+        Returns:
+            Lista de resultados en el mismo orden que ``rutas``
+        """
+        rutas = [str(ruta) for ruta in rutas]
+        resultados = self._ejecutar_en_pool(
+            _analizar_documento_worker, max_workers, rutas, [detalles] * len(rutas)
+        )
+        if resultados is None:
+            return [self.analizar_documento(ruta, detalles) for ruta in rutas]
+        return resultados
+    
+    def _ejecutar_en_pool(self, tarea, max_workers: Optional[int],
+                          *argumentos: List[Any]) -> Optional[List[Dict[str, Any]]]:
+        """Reparte ``tarea`` en un pool de procesos (None si no se pudo usar)"""
+        total = len(argumentos[0])
+        # Con un solo documento (o un solo proceso) no compensa arrancar el pool
+        if total < 2 or max_workers == 1:
+            return None
+        
+        num_procesos = max_workers or os.cpu_count() or 1
+        chunksize = max(1, total // (num_procesos * 4))
+        try:
+            # "spawn": los procesos no heredan el estado del servidor (hilos, locks)
+            with ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_inicializar_worker_lote,
+                initargs=(str(self.modelo_path), self.max_ocurrencias_por_categoria,
+                          self.max_caracteres),
+            ) as ejecutor:
+                return list(ejecutor.map(tarea, *argumentos, chunksize=chunksize))
+        except (OSError, BrokenProcessPool, pickle.PicklingError) as e:
+            logger.warning(f"No se pudo usar el pool de procesos ({e})")
+            return None
+    
+    def _analizar_contenido(self, contenido: str, nombre_archivo: str,
+                            detalles: bool = True,
+                            probabilidades_ia: Optional[Any] = None) -> Dict[str, Any]:
+        """Ejecuta el análisis (frases clave, predicción, argumentos...)"""
+        # Minúsculas y texto plegado, compartidos por todos los pasos del análisis
+        preparado = _preparar_texto(contenido)
+        # Frases clave: se calculan una vez y se reutilizan en cualquier ruta
+        frases_encontradas = self._analizar_frases_clave(
+            contenido, nombre_archivo, detalles, preparado.plegado
+        )
+        parametros = (contenido, frases_encontradas, nombre_archivo, preparado)
+        
+        # Análisis con IA si está disponible (priorizar SBERT si está listo)
+        if self.sbert_encoder is not None and self.sbert_clf is not None:
+            resultado = self._analisis_con_sbert(*parametros)
+        elif (self.modelo is not None and self.vectorizador is not None and 
+              self.clasificador is not None):
+            resultado = self._analisis_con_ia(*parametros, probabilidades_ia)
+        elif self.modelo == "basico_reglas":
+            resultado = self._analisis_hibrido_avanzado(*parametros)
+        else:
+            resultado = self._analisis_basado_reglas(*parametros)
+        
+        # NOTA: El análisis de discrepancias ya se incluye en el análisis híbrido
+        # No es necesario ejecutarlo nuevamente aquí
+        
+        # Los argumentos se extraen como tuplas Argumento y aquí se convierten a dict
+        if "argumentos" in resultado:
+            resultado["argumentos"] = [
+                arg.como_dict(contenido) if isinstance(arg, Argumento) else arg
+                for arg in resultado["argumentos"]
+            ]
+        
+        return resultado
 
-    def _analisis_con_sbert(self, contenido: str, nombre_archivo: str = None) -> Dict[str, Any]:
+    def _analisis_con_sbert(
+        self,
+        contenido: str,
+        frases_encontradas: Dict[str, Any],
+        nombre_archivo: str = None,
+        preparado: Optional[_TextoPreparado] = None,
+    ) -> Dict[str, Any]:
+        if preparado is None:
+            preparado = _preparar_texto(contenido)
         try:
             # Handle both SBERT and TF-IDF encoders
             if hasattr(self.sbert_encoder, 'encode'):
@@ -389,12 +1099,14 @@ class AnalizadorLegal:
             pred = int(proba[1] >= proba[0])
             confianza = float(max(proba))
             # Ajuste por FALLO/parte dispositiva
-            fallo = self._detectar_fallo(contenido)
+            fallo = self._detectar_fallo(contenido, preparado.minusculas)
             if fallo is not None:
                 pred = 1 if fallo else 0
                 confianza = max(confianza, 0.85)
-            frases_encontradas = self._analizar_frases_clave(contenido, nombre_archivo)
-            argumentos = self._extraer_argumentos_avanzados(contenido)
+            argumentos = self._extraer_argumentos_avanzados(
+                contenido, preparado.plegado, preparado.coincidencias_comunes
+            )
+            _, total_frases = self._resumir_frases_clave(frases_encontradas)
             insights = self._generar_insights_avanzados(bool(pred), frases_encontradas, confianza)
             return {
                 "prediccion": {
@@ -405,37 +1117,66 @@ class AnalizadorLegal:
                 },
                 "argumentos": argumentos,
                 "frases_clave": frases_encontradas,
-                "resumen_inteligente": self._generar_resumen_ia(bool(pred), confianza, frases_encontradas),
+                "resumen_inteligente": self._generar_resumen_ia(
+                    bool(pred), confianza, frases_encontradas, total_frases
+                ),
                 "insights_juridicos": insights,
-                "total_frases_clave": sum(datos["total"] for datos in frases_encontradas.values()),
+                "total_frases_clave": total_frases,
                 "modelo_ia": True,
                 "metodo_analisis": "Embeddings SBERT + Clasificador"
             }
         except Exception as e:
             logger.error(f"Error en análisis con SBERT: {e}")
-            return self._analisis_con_ia(contenido, nombre_archivo) if (self.modelo and self.vectorizador and self.clasificador) else self._analisis_basado_reglas(contenido, nombre_archivo)
+            parametros = (contenido, frases_encontradas, nombre_archivo, preparado)
+            if self.modelo and self.vectorizador and self.clasificador:
+                return self._analisis_con_ia(*parametros)
+            return self._analisis_basado_reglas(*parametros)
     
     def _leer_archivo(self, ruta: str) -> Optional[str]:
         """Lee el contenido de un archivo"""
+        return self._leer_archivo_con_limite(ruta)[0]
+    
+    def _leer_archivo_con_limite(self, ruta: str) -> Tuple[Optional[str], bool]:
+        """Lee un archivo y dice si la lectura se detuvo en ``max_caracteres``"""
         try:
             if ruta.endswith('.txt'):
-                # Intentar diferentes encodings
-                for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                    try:
-                        with open(ruta, 'r', encoding=encoding) as f:
-                            return f.read().strip()
-                    except UnicodeDecodeError:
-                        continue
-                return None
+                return self._leer_txt(ruta), False
             elif ruta.endswith('.pdf'):
                 # Leer archivo PDF
                 return self._leer_pdf(ruta)
             else:
                 # Para otros formatos, usar función genérica
-                return self._leer_archivo_generico(ruta)
+                return self._leer_archivo_generico(ruta), False
         except Exception as e:
             logger.error(f"Error leyendo archivo {ruta}: {e}")
-            return None
+            return None, False
+    
+    def _leer_txt(self, ruta: str) -> Optional[str]:
+        """Lee un .txt de disco (los grandes se decodifican desde un ``mmap``)"""
+        with open(ruta, 'rb') as f:
+            if os.fstat(f.fileno()).st_size < _UMBRAL_MMAP_BYTES:
+                return self._decodificar_texto(f.read())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+                return self._decodificar_texto(mapa)
+    
+    def _decodificar_texto(self, datos: Union[bytes, mmap.mmap]) -> Optional[str]:
+        """Decodifica un .txt por su BOM o probando diferentes encodings"""
+        encodings = ['utf-8', 'latin-1', 'cp1252']
+        for bom, encoding in _BOMS_TEXTO:
+            if datos[:len(bom)] == bom:
+                # Si no es texto válido en ese codec, se sigue con los habituales
+                encodings.insert(0, encoding)
+                break
+        for encoding in encodings:
+            try:
+                texto = str(datos, encoding)
+            except UnicodeDecodeError:
+                continue
+            # Mismo resultado que la lectura en modo texto (saltos de línea universales)
+            if "\r" in texto:
+                texto = texto.replace("\r\n", "\n").replace("\r", "\n")
+            return texto.strip()
+        return None
     
     def _leer_archivo_generico(self, ruta: str) -> str:
         """Lee archivos de diferentes formatos"""
@@ -443,53 +1184,123 @@ class AnalizadorLegal:
         # Aquí se podría extender para PDF, DOC, etc.
         return "Contenido del archivo no disponible en formato de texto"
     
-    def _leer_pdf(self, ruta: str) -> Optional[str]:
-        """Lee archivos PDF y extrae el texto"""
+    def _leer_pdf(self, ruta: str) -> Tuple[str, bool]:
+        """Lee archivos PDF (con pypdfium2 si está instalado) y extrae el texto"""
         try:
+            if PYPDFIUM2_AVAILABLE:
+                try:
+                    return self._leer_pdf_pdfium(ruta)
+                except Exception as e:
+                    if not PYPDF2_AVAILABLE:
+                        raise
+                    logger.warning(f"pypdfium2 no pudo leer {ruta} ({e}); "
+                                   "se intenta con PyPDF2")
+            
             # Verificar disponibilidad de PyPDF2
             if not PYPDF2_AVAILABLE:
                 logger.warning("PyPDF2 no está instalado")
                 logger.info("Para instalar PyPDF2 ejecuta: pip install PyPDF2")
-                return "Error: PyPDF2 no está instalado. Ejecuta: pip install PyPDF2"
+                error = "Error: PyPDF2 no está instalado. Ejecuta: pip install PyPDF2"
+                return error, False
             
-            texto = ""
             with open(ruta, 'rb') as archivo:
                 lector = PyPDF2.PdfReader(archivo)
                 
-                for pagina in lector.pages:
-                    texto += pagina.extract_text() + "\n"
+                # Unir las páginas de una vez (concatenar en bucle es cuadrático)
+                texto, incompleto = self._unir_paginas(
+                    (pagina.extract_text() or "" for pagina in lector.pages),
+                    len(lector.pages),
+                )
                 
-                return texto.strip()
+                return texto.strip(), incompleto
                 
         except Exception as e:
             logger.error(f"Error leyendo PDF {ruta}: {e}")
-            return f"Error leyendo PDF: {str(e)}"
+            return f"Error leyendo PDF: {str(e)}", False
+    
+    def _leer_pdf_pdfium(self, ruta: str) -> Tuple[str, bool]:
+        """Extrae el texto de un PDF con pypdfium2 (y si quedaron páginas sin leer)"""
+        documento = pdfium.PdfDocument(ruta)
+        
+        def textos_paginas() -> Iterator[str]:
+            for indice in range(len(documento)):
+                pagina = documento[indice]
+                pagina_texto = pagina.get_textpage()
+                try:
+                    texto_pagina = pagina_texto.get_text_range()
+                finally:
+                    pagina_texto.close()
+                    pagina.close()
+                yield texto_pagina
+        
+        try:
+            texto, incompleto = self._unir_paginas(textos_paginas(), len(documento))
+        finally:
+            documento.close()
+        
+        # PDFium separa las líneas con "\r\n": mismos saltos que el resto de lectores
+        if "\r" in texto:
+            texto = texto.replace("\r\n", "\n").replace("\r", "\n")
+        return texto.strip(), incompleto
+    
+    def _unir_paginas(self, textos_paginas: Iterator[str],
+                      total_paginas: int) -> Tuple[str, bool]:
+        """Une las páginas hasta ``max_caracteres`` y dice si quedaron sin leer"""
+        partes = []
+        total = 0
+        for texto_pagina in textos_paginas:
+            partes.append(texto_pagina)
+            total += len(texto_pagina) + 1
+            if self.max_caracteres and total >= self.max_caracteres:
+                break
+        return "\n".join(partes), len(partes) < total_paginas
+    
+    def _limitar_contenido(self, contenido: str,
+                           nombre_archivo: str) -> Tuple[str, bool]:
+        """Recorta el texto a ``max_caracteres`` y devuelve si se ha truncado"""
+        if not self.max_caracteres or len(contenido) <= self.max_caracteres:
+            return contenido, False
+        logger.warning(
+            f"{nombre_archivo}: texto de {len(contenido)} caracteres "
+            f"truncado a {self.max_caracteres}"
+        )
+        return contenido[:self.max_caracteres], True
     
-    def _analisis_con_ia(self, contenido: str, nombre_archivo: str = None) -> Dict[str, Any]:
+    def _analisis_con_ia(self, contenido: str, frases_encontradas: Dict[str, Any],
+                         nombre_archivo: str = None,
+                         preparado: Optional[_TextoPreparado] = None,
+                         probabilidades: Optional[Any] = None) -> Dict[str, Any]:
         """Análisis usando el modelo de IA"""
+        if preparado is None:
+            preparado = _preparar_texto(contenido)
         try:
-            # Vectorizar el texto
-            texto_vectorizado = self.vectorizador.transform([contenido])
+            # Probabilidades ya calculadas si el texto forma parte de un lote
+            if probabilidades is None:
+                texto_vectorizado = self.vectorizador.transform([contenido])
+                probabilidades = self.clasificador.predict_proba(texto_vectorizado)[0]
             
-            # Predicción
-            prediccion = self.clasificador.predict(texto_vectorizado)[0]
-            probabilidades = self.clasificador.predict_proba(texto_vectorizado)[0]
+            # Predicción: la clase más probable, sin una segunda pasada con predict()
+            # (equivalente para la regresión logística de los scripts de entrenamiento)
+            indice_clase = max(
+                range(len(probabilidades)), key=probabilidades.__getitem__
+            )
+            prediccion = self.clasificador.classes_[indice_clase]
             
             # Obtener confianza
             confianza = max(probabilidades)
             # Ajuste por FALLO/parte dispositiva
-            fallo = self._detectar_fallo(contenido)
+            fallo = self._detectar_fallo(contenido, preparado.minusculas)
             if fallo is not None:
                 prediccion = 1 if fallo else 0
                 confianza = max(confianza, 0.85)
             
-            # Análisis de frases clave
-            frases_encontradas = self._analizar_frases_clave(contenido, nombre_archivo)
-            
             # Extraer argumentos
-            argumentos = self._extraer_argumentos_avanzados(contenido)
+            argumentos = self._extraer_argumentos_avanzados(
+                contenido, preparado.plegado, preparado.coincidencias_comunes
+            )
             
             # Generar insights
+            _, total_frases = self._resumir_frases_clave(frases_encontradas)
             insights = self._generar_insights_avanzados(prediccion, frases_encontradas, confianza)
             
             return {
@@ -504,76 +1315,89 @@ class AnalizadorLegal:
                 },
                 "argumentos": argumentos,
                 "frases_clave": frases_encontradas,
-                "resumen_inteligente": self._generar_resumen_ia(prediccion, confianza, frases_encontradas),
+                "resumen_inteligente": self._generar_resumen_ia(
+                    prediccion, confianza, frases_encontradas, total_frases
+                ),
                 "insights_juridicos": insights,
-                "total_frases_clave": sum(datos["total"] for datos in frases_encontradas.values()),
+                "total_frases_clave": total_frases,
                 "modelo_ia": True,
                 "metodo_analisis": "IA pre-entrenada"
             }
             
         except Exception as e:
             logger.error(f"Error en análisis con IA: {e}")
-            # Fallback a análisis basado en reglas
-            return self._analisis_basado_reglas(contenido, nombre_archivo)
+            # Fallback a análisis basado en reglas (con las frases clave ya calculadas)
+            return self._analisis_basado_reglas(
+                contenido, frases_encontradas, nombre_archivo, preparado
+            )
     
-    def _analisis_basado_reglas(self, contenido: str, nombre_archivo: str = None) -> Dict[str, Any]:
-        """Análisis basado en reglas y patrones"""
-        # Análisis de frases clave
-        frases_encontradas = self._analizar_frases_clave(contenido, nombre_archivo)
-        
+    def _analisis_basado_reglas(
+        self,
+        contenido: str,
+        frases_encontradas: Dict[str, Any],
+        nombre_archivo: str = None,
+        preparado: Optional[_TextoPreparado] = None,
+    ) -> Dict[str, Any]:
+        """Análisis basado en reglas y patrones sobre las frases clave ya calculadas"""
+        if preparado is None:
+            preparado = _preparar_texto(contenido)
         # Predicción basada en reglas
-        prediccion = self._prediccion_basada_reglas(contenido)
+        prediccion = self._prediccion_basada_reglas(contenido, preparado.minusculas)
         
         # Extraer argumentos
-        argumentos = self._extraer_argumentos_basicos(contenido)
+        argumentos = self._extraer_argumentos_basicos(
+            contenido, preparado.plegado, preparado.coincidencias_comunes
+        )
         
         # Generar insights
-        insights = self._generar_insights_basicos(prediccion, frases_encontradas)
+        categorias, total_frases = self._resumir_frases_clave(frases_encontradas)
+        insights = self._generar_insights_basicos(
+            prediccion, frases_encontradas, categorias
+        )
         
         return {
             "prediccion": prediccion,
             "argumentos": argumentos,
             "frases_clave": frases_encontradas,
-            "resumen_inteligente": self._generar_resumen_reglas(prediccion, frases_encontradas),
+            "resumen_inteligente": self._generar_resumen_reglas(
+                prediccion, frases_encontradas, total_frases
+            ),
             "insights_juridicos": insights,
-            "total_frases_clave": sum(datos["total"] for datos in frases_encontradas.values()),
+            "total_frases_clave": total_frases,
             "modelo_ia": False,
             "metodo_analisis": "Reglas y patrones"
         }
     
-    def _analizar_frases_clave(self, texto: str, nombre_archivo: str = None) -> Dict[str, Any]:
+    def _analizar_frases_clave(self, texto: str, nombre_archivo: str = None,
+                               detalles: bool = True,
+                               texto_plegado: Optional[str] = None) -> Dict[str, Any]:
         """Analiza las frases clave en el texto (método genérico que delega al específico por tipo)"""
         # Detectar tipo de documento
         tipo_documento = self._detectar_tipo_documento_por_nombre(nombre_archivo)
         
         # Usar el método específico por tipo
-        return self._analizar_frases_clave_por_tipo(texto, nombre_archivo, tipo_documento)
+        return self._analizar_frases_clave_por_tipo(
+            texto, nombre_archivo, tipo_documento, detalles, texto_plegado
+        )
     
-    def _prediccion_basada_reglas(self, texto: str) -> Dict[str, Any]:
+    def _prediccion_basada_reglas(self, texto: str,
+                                  texto_lower: Optional[str] = None) -> Dict[str, Any]:
         """Predicción basada en reglas y patrones con sistema de confianza avanzado y detección automática de factores"""
         
         # Sistema de puntuación avanzado con detección automática
         puntuacion = 0
         factores = {}
         
-        texto_lower = texto.lower()
+        if texto_lower is None:
+            texto_lower = texto.lower()
+        # Tokenizar una sola vez: los términos simples se cuentan por intersección
+        tokens = set(_TOKEN_RE.findall(texto_lower))
         
         # 1. ANÁLISIS AVANZADO DE PALABRAS CLAVE (peso: 25%)
-        palabras_favorables = [
-            "procedente", "estimamos", "accedemos", "concedemos", "reconocemos",
-            "favorable", "justificado", "acreditado", "confirmado", "establecido",
-            "fundada", "procede", "accede", "concede", "reconoce", "estimamos",
-            "accedemos", "concedemos", "reconocemos", "estimamos", "accedemos"
-        ]
-        
-        palabras_desfavorables = [
-            "desestimamos", "infundada", "rechazamos", "denegamos", "no procedente",
-            "desfavorable", "no acreditado", "insuficiente", "negligencia", "culpabilidad",
-            "infundada", "desestima", "rechaza", "denega", "desestimamos"
-        ]
-        
-        favorables = sum(1 for palabra in palabras_favorables if palabra in texto_lower)
-        desfavorables = sum(1 for palabra in palabras_desfavorables if palabra in texto_lower)
+        favorables = len(_FAVORABLES_SIMPLES & tokens)
+        favorables += sum(1 for p in _FAVORABLES_COMPUESTAS if p in texto_lower)
+        desfavorables = len(_DESFAVORABLES_SIMPLES & tokens)
+        desfavorables += sum(1 for p in _DESFAVORABLES_COMPUESTAS if p in texto_lower)
         
         total_palabras = favorables + desfavorables
         if total_palabras > 0:
@@ -591,16 +1415,16 @@ class AnalizadorLegal:
         estructura_score = 0
         estructura_elementos = []
         
-        if "argumentos" in texto_lower or "fundamentos" in texto_lower:
+        if "argumentos" in tokens or "fundamentos" in tokens:
             estructura_score += 0.3
             estructura_elementos.append("argumentos/fundamentos")
-        if "conclusiones" in texto_lower or "resolucion" in texto_lower:
+        if "conclusiones" in tokens or "resolucion" in tokens:
             estructura_score += 0.3
             estructura_elementos.append("conclusiones/resolución")
-        if "hechos" in texto_lower or "antecedentes" in texto_lower:
+        if "hechos" in tokens or "antecedentes" in tokens:
             estructura_score += 0.2
             estructura_elementos.append("hechos/antecedentes")
-        if "solicitud" in texto_lower or "petitum" in texto_lower:
+        if "solicitud" in tokens or "petitum" in tokens:
             estructura_score += 0.2
             estructura_elementos.append("solicitud/petitum")
         
@@ -692,9 +1516,8 @@ class AnalizadorLegal:
         terminologia_score = 0
         terminologia_elementos = []
         
-        juridicos = ["actor", "demandado", "procedimiento", "instancia", "resolución", "recurso", "fundamento", "considerando"]
-        for termino in juridicos:
-            if termino in texto_lower:
+        for termino in _TERMINOS_JURIDICOS:
+            if termino in tokens:
                 terminologia_score += 0.125
                 terminologia_elementos.append(termino)
         
@@ -727,7 +1550,7 @@ class AnalizadorLegal:
         # Generar recomendaciones generales
         recomendaciones_generales = self._generar_recomendaciones_generales(factores, confianza, es_favorable)
         # Ajuste por FALLO/parte dispositiva
-        fallo = self._detectar_fallo(texto)
+        fallo = self._detectar_fallo(texto, texto_lower)
         if fallo is not None:
             es_favorable = bool(fallo)
             confianza = max(confianza, 0.85)
@@ -890,194 +1713,214 @@ class AnalizadorLegal:
             "factores_analizados": len(factores)
         }
     
-    def _extraer_argumentos_avanzados(self, texto: str) -> List[Dict[str, Any]]:
+    def _extraer_argumentos_avanzados(
+        self,
+        texto: str,
+        texto_plegado: Optional[str] = None,
+        coincidencias_comunes: Optional[_CoincidenciasPorPatron] = None,
+    ) -> List[Argumento]:
         """Extrae argumentos legales avanzados"""
-        argumentos = []
-        
-        patrones_avanzados = [
-            r"por\s+(?:lo\s+)?que\s+([^.]*?\.)",
-            r"fundamentos?\s+(?:de\s+)?(?:derecho|derecho\s+por\s+lo\s+que)\s+([^.]*?\.)",
-            r"considerando\s+que\s+([^.]*?\.)",
-            r"vistos\s+([^.]*?\.)",
-            r"resultando\s+([^.]*?\.)",
-            r"en\s+su\s+virtud\s+([^.]*?\.)",
-            r"por\s+ello\s+([^.]*?\.)"
+        posiciones = []
+        textos_argumento = []
+        coincidencias_por_patron = _coincidencias_argumentos(
+            texto, _PATRONES_SOLO_AVANZADOS, texto_plegado, coincidencias_comunes
+        )
+        for coincidencias in coincidencias_por_patron:
+            for inicio, _, inicio_argumento, fin_argumento in coincidencias:
+                # El patrón ya garantiza más de 20 caracteres sin espacios extremos
+                posiciones.append(inicio)
+                textos_argumento.append(texto[inicio_argumento:fin_argumento])
+        
+        # Calcular confianza basada en la longitud y complejidad (todas de una vez)
+        longitudes = [len(argumento) for argumento in textos_argumento]
+        confianzas = _confianzas_por_longitud(longitudes)
+        
+        return [
+            Argumento(
+                tipo="argumento_legal",
+                texto=argumento,
+                posicion=posicion,
+                confianza=confianza,
+                categoria="fundamento_juridico",
+                longitud=longitud
+            )
+            for posicion, argumento, confianza, longitud in zip(
+                posiciones, textos_argumento, confianzas, longitudes
+            )
         ]
-        
-        for patron in patrones_avanzados:
-            matches = re.finditer(patron, texto, re.IGNORECASE)
-            for match in matches:
-                argumento = match.group(1).strip()
-                if len(argumento) > 20:
-                    # Calcular confianza basada en la longitud y complejidad
-                    confianza = min(0.95, 0.6 + (len(argumento) / 1000) * 0.3)
-                    
-                    argumentos.append({
-                        "tipo": "argumento_legal",
-                        "texto": argumento,
-                        "posicion": match.start(),
-                        "confianza": confianza,
-                        "categoria": "fundamento_juridico",
-                        "longitud": len(argumento)
-                    })
-        
-        return argumentos
     
-    def _extraer_argumentos_basicos(self, texto: str) -> List[Dict[str, Any]]:
+    def _extraer_argumentos_basicos(
+        self,
+        texto: str,
+        texto_plegado: Optional[str] = None,
+        coincidencias_comunes: Optional[_CoincidenciasPorPatron] = None,
+    ) -> List[Argumento]:
         """Extrae argumentos legales básicos con contexto mejorado"""
         argumentos = []
         
-        patrones = [
-            r"por\s+(?:lo\s+)?que\s+([^.]*?\.)",
-            r"fundamentos?\s+(?:de\s+)?(?:derecho|derecho\s+por\s+lo\s+que)\s+([^.]*?\.)",
-            r"considerando\s+que\s+([^.]*?\.)",
-            r"vistos\s+([^.]*?\.)",
-            r"resultando\s+([^.]*?\.)",
-            r"primer[ao]?\s*[.-]\s*([^.]*?\.)",
-            r"segund[ao]?\s*[.-]\s*([^.]*?\.)",
-            r"tercer[ao]?\s*[.-]\s*([^.]*?\.)",
-            r"decim[ao]?\s*[.-]\s*([^.]*?\.)"
-        ]
-        
-        for patron in patrones:
-            matches = re.finditer(patron, texto, re.IGNORECASE)
-            for match in matches:
-                argumento = match.group(1).strip()
+        coincidencias_por_patron = _coincidencias_argumentos(
+            texto, _PATRONES_SOLO_BASICOS, texto_plegado, coincidencias_comunes
+        )
+        for coincidencias in coincidencias_por_patron:
+            for start_pos, end_pos, inicio_argumento, fin_argumento in coincidencias:
+                # Descartar por la longitud del span antes de crear la cadena: si ni
+                # siquiera sin recortar supera 20 caracteres, no hace falta copiarla
+                if fin_argumento - inicio_argumento <= 20:
+                    continue
+                argumento = texto[inicio_argumento:fin_argumento].strip()
+                # Los patrones comunes ya garantizan la longitud; los ordinales, aquí
                 if len(argumento) > 20:
-                    # Obtener contexto más amplio para el argumento
-                    start_pos = match.start()
-                    end_pos = match.end()
-                    
-                    # Contexto de 500 caracteres para argumentos completos
+                    # Contexto de 500 caracteres alrededor de la coincidencia: solo el
+                    # rango, el texto se recorta al final con obtener_contexto()
                     context_start = max(0, start_pos - 500)
                     context_end = min(len(texto), end_pos + 500)
-                    contexto = texto[context_start:context_end]
                     
-                    argumentos.append({
-                        "tipo": "argumento_legal",
-                        "texto": argumento,
-                        "posicion": start_pos,
-                        "confianza": 0.8,
-                        "categoria": "fundamento_juridico",
-                        "contexto": contexto
-                    })
+                    argumentos.append(Argumento(
+                        tipo="argumento_legal",
+                        texto=argumento,
+                        posicion=start_pos,
+                        confianza=0.8,
+                        categoria="fundamento_juridico",
+                        contexto_rango=(context_start, context_end)
+                    ))
         
         return argumentos
     
-    def _generar_insights_avanzados(self, prediccion: bool, frases_clave: Dict, confianza: float) -> List[str]:
-        """Genera insights jurídicos avanzados"""
-        insights = []
-        
+    def _iter_insights_avanzados(self, prediccion: bool, frases_clave: Dict,
+                                 confianza: float) -> Iterator[str]:
+        """Genera (de forma perezosa) los insights jurídicos avanzados"""
         if prediccion:
-            insights.append("El documento presenta argumentos sólidos a favor del caso.")
-            insights.append("La resolución favorece al reclamante basándose en evidencia legal.")
+            yield from _INSIGHTS_FAVORABLE_AVANZADOS
         else:
-            insights.append("El documento presenta argumentos que pueden ser desfavorables.")
-            insights.append("La resolución no favorece al reclamante según el análisis legal.")
+            yield from _INSIGHTS_DESFAVORABLE_AVANZADOS
         
         if frases_clave:
-            categorias = list(frases_clave.keys())
-            insights.append(f"Se identificaron {len(categorias)} categorías de frases clave relevantes.")
+            yield (f"Se identificaron {len(frases_clave)} categorías "
+                   "de frases clave relevantes.")
             
             # Análisis de categorías más importantes
             if "incapacidad_permanente_parcial" in frases_clave:
-                insights.append("El caso involucra aspectos de incapacidad permanente parcial.")
+                yield "El caso involucra aspectos de incapacidad permanente parcial."
             
             if "reclamacion_administrativa" in frases_clave:
-                insights.append("Se identificaron elementos de reclamación administrativa previa.")
+                yield "Se identificaron elementos de reclamación administrativa previa."
         
-        insights.append(f"Confianza del análisis: {confianza:.1%}")
-        insights.append("Análisis realizado con modelo de IA pre-entrenado.")
-        
-        return insights
+        yield f"Confianza del análisis: {confianza:.1%}"
+        yield "Análisis realizado con modelo de IA pre-entrenado."
     
-    def _generar_insights_basicos(self, prediccion: Dict, frases_clave: Dict) -> List[str]:
-        """Genera insights jurídicos básicos"""
-        insights = []
-        
+    def _generar_insights_avanzados(self, prediccion: bool, frases_clave: Dict, confianza: float) -> List[str]:
+        """Genera insights jurídicos avanzados (ver _iter_insights_avanzados)"""
+        return list(self._iter_insights_avanzados(prediccion, frases_clave, confianza))
+    
+    def _resumir_frases_clave(self, frases_clave: Dict) -> Tuple[Tuple[str, ...], int]:
+        """Categorías y total de ocurrencias de las frases clave"""
+        total = sum(datos["total"] for datos in frases_clave.values())
+        return tuple(frases_clave), total
+    
+    def _iter_insights_basicos(
+        self,
+        prediccion: Dict,
+        frases_clave: Dict,
+        categorias: Optional[Tuple[str, ...]] = None,
+    ) -> Iterator[str]:
+        """Genera (de forma perezosa) los insights jurídicos básicos"""
         if prediccion["es_favorable"]:
-            insights.append("El documento presenta argumentos sólidos a favor del caso.")
-            insights.append("La resolución favorece al reclamante.")
+            yield from _INSIGHTS_FAVORABLE_BASICOS
         else:
-            insights.append("El documento presenta argumentos que pueden ser desfavorables.")
-            insights.append("La resolución no favorece al reclamante.")
+            yield from _INSIGHTS_DESFAVORABLE_BASICOS
         
         if frases_clave:
-            categorias = list(frases_clave.keys())
-            insights.append(f"Se identificaron {len(categorias)} categorías de frases clave.")
-            insights.append(f"Las categorías más relevantes son: {', '.join(categorias[:3])}.")
-        
-        insights.append(f"Confianza del análisis: {prediccion['confianza']:.1%}")
-        insights.append("Análisis realizado con reglas y patrones.")
+            if categorias is None:
+                categorias = tuple(frases_clave)
+            yield f"Se identificaron {len(categorias)} categorías de frases clave."
+            yield f"Las categorías más relevantes son: {', '.join(categorias[:3])}."
         
-        return insights
+        yield f"Confianza del análisis: {prediccion['confianza']:.1%}"
+        yield "Análisis realizado con reglas y patrones."
     
-    def _generar_resumen_ia(self, prediccion: bool, confianza: float, frases_clave: Dict) -> str:
+    def _generar_insights_basicos(
+        self,
+        prediccion: Dict,
+        frases_clave: Dict,
+        categorias: Optional[Tuple[str, ...]] = None,
+    ) -> List[str]:
+        """Genera insights jurídicos básicos (ver _iter_insights_basicos)"""
+        return list(self._iter_insights_basicos(prediccion, frases_clave, categorias))
+    
+    def _generar_resumen_ia(self, prediccion: bool, confianza: float,
+                            frases_clave: Dict,
+                            total_frases: Optional[int] = None) -> str:
         """Genera resumen inteligente usando IA"""
         if prediccion:
-            base = "Análisis favorable del documento legal usando IA. "
+            partes = ["Análisis favorable del documento legal usando IA. "]
         else:
-            base = "Análisis desfavorable del documento legal usando IA. "
+            partes = ["Análisis desfavorable del documento legal usando IA. "]
         
         if frases_clave:
-            total_frases = sum(datos["total"] for datos in frases_clave.values())
-            base += f"Se identificaron {total_frases} frases clave relevantes. "
+            if total_frases is None:
+                _, total_frases = self._resumir_frases_clave(frases_clave)
+            partes.append(f"Se identificaron {total_frases} frases clave relevantes. ")
         
-        base += f"Confianza del análisis: {confianza:.1%}. "
-        base += "Análisis realizado con modelo de IA pre-entrenado."
+        partes.append(f"Confianza del análisis: {confianza:.1%}. ")
+        partes.append("Análisis realizado con modelo de IA pre-entrenado.")
         
-        return base
+        return "".join(partes)
     
-    def _generar_resumen_reglas(self, prediccion: Dict, frases_clave: Dict) -> str:
+    def _generar_resumen_reglas(self, prediccion: Dict, frases_clave: Dict,
+                                total_frases: Optional[int] = None) -> str:
         """Genera resumen basado en reglas con análisis detallado"""
         if prediccion["es_favorable"]:
-            base = "Análisis favorable del documento legal. "
+            partes = ["Análisis favorable del documento legal. "]
         else:
-            base = "Análisis desfavorable del documento legal. "
+            partes = ["Análisis desfavorable del documento legal. "]
         
         if frases_clave:
-            total_frases = sum(datos["total"] for datos in frases_clave.values())
-            base += f"Se identificaron {total_frases} frases clave relevantes. "
+            if total_frases is None:
+                _, total_frases = self._resumir_frases_clave(frases_clave)
+            partes.append(f"Se identificaron {total_frases} frases clave relevantes. ")
         
         # Agregar información de factores si está disponible
         if "factores_analisis" in prediccion:
             factores = prediccion["factores_analisis"]
-            base += "Factores analizados: "
+            partes.append("Factores analizados: ")
             
             if "palabras_clave" in factores:
-                base += f"Palabras clave ({factores['palabras_clave']['score']:.2f}), "
+                partes.append(
+                    f"Palabras clave ({factores['palabras_clave']['score']:.2f}), "
+                )
             if "estructura" in factores:
-                base += f"Estructura ({factores['estructura']['score']:.2f}), "
+                partes.append(f"Estructura ({factores['estructura']['score']:.2f}), ")
             if "evidencia" in factores:
-                base += f"Evidencia médica ({factores['evidencia']['score']:.2f}), "
+                partes.append(
+                    f"Evidencia médica ({factores['evidencia']['score']:.2f}), "
+                )
             if "procedimiento" in factores:
-                base += f"Procedimiento legal ({factores['procedimiento']['score']:.2f}), "
+                partes.append(
+                    f"Procedimiento legal ({factores['procedimiento']['score']:.2f}), "
+                )
             if "contexto" in factores:
-                base += f"Contexto laboral ({factores['contexto']['score']:.2f}). "
+                partes.append(
+                    f"Contexto laboral ({factores['contexto']['score']:.2f}). "
+                )
         
-        base += f"Confianza del análisis: {prediccion['confianza']:.1%}. "
-        base += f"Método: {prediccion.get('metodo', 'Reglas y patrones')}."
+        partes.append(f"Confianza del análisis: {prediccion['confianza']:.1%}. ")
+        partes.append(f"Método: {prediccion.get('metodo', 'Reglas y patrones')}.")
         
-        return base
+        return "".join(partes)
     
     def _obtener_timestamp(self) -> str:
         """Obtiene el timestamp actual"""
-        from datetime import datetime
         return datetime.now().isoformat()
     
     def _crear_resultado_error(self, mensaje: str) -> Dict[str, Any]:
-        """Crea un resultado de error estandarizado"""
+        """Crea un resultado de error estandarizado a partir de ``_PLANTILLA_ERROR``"""
         return {
+            **_PLANTILLA_ERROR,
             "error": mensaje,
-            "procesado": False,
-            "nombre_archivo": "archivo_desconocido",
             "prediccion": {"es_favorable": False, "confianza": 0.0},
             "frases_clave": {},
             "argumentos": [],
-            "insights_juridicos": [f"Error: {mensaje}"],
-            "longitud_texto": 0,
-            "total_frases_clave": 0,
-            "modelo_ia": False
+            "insights_juridicos": [f"Error: {mensaje}"]
         }
 
     def _detectar_tipo_documento_por_nombre(self, nombre_archivo: str) -> str:
@@ -1097,7 +1940,14 @@ class AnalizadorLegal:
         
         return "documento_generico"
     
-    def _analizar_frases_clave_por_tipo(self, texto: str, nombre_archivo: str = None, tipo_documento: str = "documento_generico") -> Dict[str, Any]:
+    def _analizar_frases_clave_por_tipo(
+        self,
+        texto: str,
+        nombre_archivo: str = None,
+        tipo_documento: str = "documento_generico",
+        detalles: bool = True,
+        texto_plegado: Optional[str] = None,
+    ) -> Dict[str, Any]:
         """Analiza las frases clave específicas según el tipo de documento"""
         if not texto:
             return {}
@@ -1105,160 +1955,102 @@ class AnalizadorLegal:
         # Usar el nombre del archivo real o un valor por defecto
         archivo_nombre = nombre_archivo or "archivo_desconocido"
         
-        # Seleccionar frases clave según el tipo de documento
-        if tipo_documento == "sentencia":
-            frases_clave_tipo = self._get_frases_clave_sentencia()
-        elif tipo_documento == "informe_medico":
-            frases_clave_tipo = self._get_frases_clave_informe_medico()
-        else:
-            frases_clave_tipo = self.frases_clave  # Usar frases clave genéricas
+        # Frases clave según el tipo de documento (las genéricas si no hay específicas)
+        indice = _INDICES_FRASES_POR_TIPO.get(tipo_documento, self._indice_frases_clave)
+        
+        # Ocurrencias detalladas (contexto, línea) solo hasta el cupo de cada categoría
+        max_ocurrencias = self.max_ocurrencias_por_categoria if detalles else 0
+        
+        # Buscar sobre el texto plegado; si casefold() cambia la longitud (p. ej. "ß")
+        # las posiciones no coinciden y se busca sobre el original con IGNORECASE
+        texto_busqueda = texto.casefold() if texto_plegado is None else texto_plegado
+        plegado = len(texto_busqueda) == len(texto)
+        if not plegado:
+            texto_busqueda = texto
+        
+        # Coincidencia flexible de todas las variantes a la vez
+        posiciones = _buscar_variantes(indice.variantes, texto_busqueda, plegado)
+        
+        # Saltos de línea, calculados solo si se construye alguna ocurrencia detallada
+        saltos_linea = None
         
         resultados = {}
-        for categoria, variantes in frases_clave_tipo.items():
+        categorias = zip(indice.categorias, indice.ids_por_categoria)
+        for categoria, ids_variantes in categorias:
             total = 0
             ocurrencias = []
+            frases_set = set()
             
-            for variante in variantes:
-                # Coincidencia flexible: espacios/guiones/underscores equivalentes
-                flexible = re.escape(variante)
-                flexible = flexible.replace("\\ ", "\\s+")
-                flexible = flexible.replace("\\_", "[\\s_\-]+")
-                flexible = flexible.replace("\\-", "[\\s_\-]+")
-                patron = re.compile(flexible, re.IGNORECASE)
-                matches = patron.finditer(texto)
+            for id_variante in ids_variantes:
+                coincidencias = posiciones[id_variante]
+                if not coincidencias:
+                    continue
+                variante = indice.variantes[id_variante]
+                total += len(coincidencias)
+                frases_set.add(variante)
                 
-                for match in matches:
-                    total += 1
-                    start_pos = match.start()
-                    end_pos = match.end()
-                    
+                # Solo las primeras coincidencias hasta completar el cupo llevan detalle
+                cupo = max_ocurrencias - len(ocurrencias)
+                for start_pos, end_pos in coincidencias[:cupo]:
                     # Obtener contexto (300 caracteres antes y después para mayor claridad)
                     context_start = max(0, start_pos - 300)
                     context_end = min(len(texto), end_pos + 300)
                     contexto = texto[context_start:context_end]
                     
-                    # Marcar la frase encontrada
-                    frase_encontrada = texto[start_pos:end_pos]
-                    contexto_marcado = contexto.replace(frase_encontrada, f"**{frase_encontrada}**")
+                    # Marcar solo la frase encontrada usando sus posiciones conocidas
+                    local_start = start_pos - context_start
+                    local_end = end_pos - context_start
+                    contexto_marcado = (
+                        f"{contexto[:local_start]}**{contexto[local_start:local_end]}**"
+                        f"{contexto[local_end:]}"
+                    )
+                    
+                    if saltos_linea is None:
+                        saltos_linea = _posiciones_saltos_linea(texto)
                     
                     ocurrencias.append({
                         "frase": variante,
                         "posicion": start_pos,
                         "contexto": contexto_marcado,
-                        "linea": texto[:start_pos].count('\n') + 1,
+                        "linea": bisect.bisect_left(saltos_linea, start_pos) + 1,
                         "archivo": archivo_nombre,
                         "tipo_documento": tipo_documento
                     })
             
             if total > 0:
-                # Obtener frases únicas encontradas
-                frases_encontradas = list(set([oc["frase"] for oc in ocurrencias]))
-                
                 resultados[categoria] = {
                     "total": total,
                     "ocurrencias": ocurrencias,
-                    "frases": frases_encontradas,
+                    "frases": list(frases_set),
                     "tipo_documento": tipo_documento
                 }
         
         return resultados
     
-    def _get_frases_clave_sentencia(self) -> Dict[str, List[str]]:
+    def _get_frases_clave_sentencia(self) -> Dict[str, Tuple[str, ...]]:
         """Frases clave específicas para sentencias"""
-        return {
-            "fundamentos_juridicos": [
-                "fundamentos de derecho", "fundamentos jurídicos", "fundamento", "fundamentos",
-                "considerando", "considerandos", "vistos", "resultando", "por lo que"
-            ],
-            "conclusiones_judiciales": [
-                "estimamos", "desestimamos", "procedente", "improcedente", "accedemos",
-                "concedemos", "reconocemos", "denegamos", "rechazamos", "fallamos"
-            ],
-            "incapacidad_permanente_parcial": [
-                "incapacidad permanente parcial", "IPP", "permanente parcial",
-                "incapacidad parcial permanente", "secuela permanente",
-                "incapacidad permanente", "secuelas permanentes"
-            ],
-            "procedimiento_legal": [
-                "procedente", "desestimamos", "estimamos", "fundada",
-                "infundada", "accedemos", "concedemos", "reconocemos",
-                "recurso", "instancia", "tribunal supremo", "STS"
-            ],
-            "lesiones_hombro": [
-                "rotura del manguito rotador", "supraespinoso", "hombro derecho",
-                "lesión de hombro", "manguito rotador", "tendón supraespinoso",
-                "hombro", "manguito", "lesiones del hombro"
-            ],
-            "inss": [
-                "INSS", "Instituto Nacional de la Seguridad Social", "Seguridad Social",
-                "Instituto Nacional", "Seguridad Social"
-            ]
-        }
+        return _FRASES_CLAVE_SENTENCIA
     
-    def _get_frases_clave_informe_medico(self) -> Dict[str, List[str]]:
+    def _get_frases_clave_informe_medico(self) -> Dict[str, Tuple[str, ...]]:
         """Frases clave específicas para informes médicos"""
-        return {
-            "diagnostico_medico": [
-                "diagnóstico", "diagnóstico médico", "diagnóstico clínico",
-                "exploración física", "examen físico", "evaluación médica"
-            ],
-            "lesiones_anatomicas": [
-                "rotura del manguito rotador", "supraespinoso", "hombro derecho",
-                "lesión de hombro", "manguito rotador", "tendón supraespinoso",
-                "hombro", "manguito", "lesiones del hombro", "tenopatía",
-                "artropatía acromioclavicular", "retracción fibrilar"
-            ],
-            "limitaciones_funcionales": [
-                "limitación funcional", "limitaciones funcionales", "flexión activa",
-                "abducción activa", "fuerza insuficiente", "balance muscular",
-                "fuerza de garra", "limitación activa", "discinesia escapular",
-                "atrofia periescapular", "desarrollo de fuerza"
-            ],
-            "evidencia_objetiva": [
-                "RMN", "resonancia magnética", "TAC", "tomografía", "radiografía",
-                "informe de biomecánica", "pruebas complementarias", "anclajes",
-                "tornillos", "cirugía reconstructiva"
-            ],
-            "incapacidad_permanente_parcial": [
-                "incapacidad permanente parcial", "IPP", "permanente parcial",
-                "incapacidad parcial permanente", "secuela permanente",
-                "incapacidad permanente", "secuelas permanentes"
-            ],
-            "personal_limpieza": [
-                "limpiadora", "personal de limpieza", "servicios de limpieza",
-                "trabajador de limpieza", "empleada de limpieza", "limpieza"
-            ],
-            "accidente_laboral": [
-                "accidente laboral", "accidente de trabajo", "accidente durante",
-                "jornada laboral", "lugar de trabajo", "accidente en el trabajo"
-            ]
-        }
+        return _FRASES_CLAVE_INFORME_MEDICO
 
-    def _detectar_fallo(self, texto: str) -> Optional[bool]:
+    def _detectar_fallo(self, texto: str,
+                        texto_lower: Optional[str] = None) -> Optional[bool]:
         """Detecta el sentido del fallo/parte dispositiva si está presente.
         Devuelve True si claramente favorable, False si claramente desfavorable, None si ambiguo.
         """
         try:
-            t = texto.lower()
+            t = texto.lower() if texto_lower is None else texto_lower
             # Heurística: buscar sección de FALLO o parte dispositiva cercana
             # Tomar ventana alrededor de palabras clave
-            claves_seccion = ["fallo", "parte dispositiva", "resolvemos", "acordamos"]
-            idxs = [t.find(k) for k in claves_seccion if k in t]
+            idxs = [t.find(k) for k in _CLAVES_SECCION_FALLO if k in t]
             ventana = t
             if idxs:
                 i = min([i for i in idxs if i >= 0])
                 ventana = t[max(0, i-800): i+1200]
-            # Patrones favorables típicos
-            fav = [
-                "estimamos", "estimando", "se estima", "procedente", "concedemos", "acogemos",
-                "reconocemos", "se reconoce", "revocamos la sentencia de instancia y declaramos",
-                "declaramos la incapacidad permanente", "declaramos procedente"
-            ]
-            # Patrones desfavorables típicos
-            des = [
-                "desestimamos", "desestimando", "se desestima", "improcedente", "no ha lugar",
-                "confirmamos la sentencia de instancia", "absolvemos", "denegamos", "rechazamos"
-            ]
+            fav = _PATRONES_FALLO_FAVORABLES
+            des = _PATRONES_FALLO_DESFAVORABLES
             # Contar ocurrencias en ventana (más peso) y en todo el texto
             fav_score = sum(ventana.count(p) for p in fav) * 2 + sum(t.count(p) for p in fav)
             des_score = sum(ventana.count(p) for p in des) * 2 + sum(t.count(p) for p in des)
@@ -1275,6 +2067,30 @@ def crear_analizador() -> AnalizadorLegal:
     return AnalizadorLegal()
 
 
+# Analizador propio de cada proceso del pool de AnalizadorLegal.analizar_lote
+_ANALIZADOR_LOTE: Optional[AnalizadorLegal] = None
+
+
+def _inicializar_worker_lote(modelo_path: str, max_ocurrencias_por_categoria: int,
+                            max_caracteres: int) -> None:
+    """Carga el analizador una vez por proceso del lote"""
+    global _ANALIZADOR_LOTE
+    _ANALIZADOR_LOTE = AnalizadorLegal(
+        modelo_path, max_ocurrencias_por_categoria, max_caracteres=max_caracteres
+    )
+
+
+def _analizar_bloque_worker(textos: List[str], nombres: List[str],
+                            detalles: bool) -> List[Dict[str, Any]]:
+    """Tarea de un proceso del lote: analiza un bloque de textos"""
+    return _ANALIZADOR_LOTE._analizar_textos(textos, nombres, detalles)
+
+
+def _analizar_documento_worker(ruta_archivo: str, detalles: bool) -> Dict[str, Any]:
+    """Tarea de un proceso del lote de archivos: lee y analiza un archivo"""
+    return _ANALIZADOR_LOTE.analizar_documento(ruta_archivo, detalles)
+
+
 if __name__ == "__main__":
     # Prueba del analizador
     analizador = AnalizadorLegal()
@@ -7,12 +7,214 @@ Especializado en identificar contradicciones y argumentos jurídicos específico
 
 import re
 import logging
-from typing import Dict, List, Any, Optional, Tuple
+from collections import defaultdict
+from typing import Dict, List, Any, Optional, Tuple, NamedTuple, FrozenSet
 from datetime import datetime
 import json
 
 logger = logging.getLogger(__name__)
 
+# Expresiones fijas de los detectores, compiladas una sola vez al importar el módulo
+# (se aplican sobre el texto en minúsculas)
+_RE_ALTA_MEDICA = re.compile(r"alta\s+médica.*?(?:no\s+presenta\s+limitación|no\s+impide)")
+_RE_CONCLUSION_SUBJETIVA = re.compile(r"(?:molestias?|dolor\s+leve|síntomas?\s+menores?)")
+# La duración solo puede empezar por "durante" o por una cifra: el lookahead inicial descarta el
+# resto de posiciones sin probar el prefijo opcional en cada carácter
+_RE_DURACION = re.compile(r"(?=[d\d])(?:durante\s+)?(\d+)\s*(?:meses?|años?)")
+
+
+# Palabras clave literales que consultan los detectores de sentencias
+_PALABRAS_CLAVE_SENTENCIA = (
+    "informe", "médico", "médica", "incapacidad permanente parcial", "ipp", "artículo",
+    "194", "lgss", "supraespinoso", "hombro", "estimamos", "desestimamos"
+)
+
+
+def _palabras_clave_presentes(texto_lower: str) -> FrozenSet[str]:
+    """Palabras de ``_PALABRAS_CLAVE_SENTENCIA`` presentes en el texto ya en minúsculas. Se buscan una
+    sola vez por documento y los detectores de sentencias consultan el conjunto resultante"""
+    return frozenset(palabra for palabra in _PALABRAS_CLAVE_SENTENCIA if palabra in texto_lower)
+
+
+# Puntos de cada discrepancia según su severidad y de cada evidencia según su relevancia
+# (cualquier otro valor: 10 y 5 puntos respectivamente)
+_PUNTOS_SEVERIDAD = {"alta": 25, "media": 15}
+_PUNTOS_RELEVANCIA = {"alta": 15, "media": 10}
+
+# Indicadores de contenido para detectar el tipo de documento
+_INDICADORES_SENTENCIA = (
+    "tribunal supremo", "sts", "sentencia", "magistrado", "magistrada",
+    "fallamos", "estimamos", "desestimamos", "resuelvo", "resolvemos",
+    "parte dispositiva", "fundamentos de derecho", "antecedentes de hecho"
+)
+_INDICADORES_INFORME = (
+    "informe médico", "diagnóstico", "tratamiento", "evolución", "pronóstico",
+    "exploración física", "pruebas complementarias", "alta médica", "baja médica",
+    "limitaciones funcionales", "capacidad laboral"
+)
+
+# Flags de compilación por categoría de patrones: las contradicciones internas se buscan sin
+# distinguir mayúsculas y cruzando saltos de línea; el resto se compila en minúsculas y se busca
+# sobre el texto en minúsculas (equivale a IGNORECASE y es bastante más rápido con ``re``)
+_FLAGS_PATRONES = {
+    "contradicciones_internas": re.IGNORECASE | re.DOTALL
+}
+
+
+# Patrones de discrepancias médicas-legales por categoría
+_PATRONES_DISCREPANCIAS = {
+    "lesiones_graves": (
+        r"rotura\s+(?:de\s+)?espesor\s+completo",
+        r"retracción\s+fibrilar\s+\d+\s*mm",
+        r"tenopatía\s+severa",
+        r"artropatía\s+acromioclavicular\s+severa",
+        r"lesión\s+estructural\s+grave",
+        r"rotura\s+completa\s+del\s+manguito\s+rotador",
+        r"anclajes?\s+(?:corkscrew|tornillos?)",
+        r"cirugía\s+reconstructiva"
+    ),
+    "limitaciones_funcionales": (
+        r"flexión\s+activa\s+solo\s+\d+[°º]",
+        r"abducción\s+activa\s+\d+[°º]",
+        r"fuerza\s+insuficiente\s+para\s+vencer\s+la\s+gravedad",
+        r"balance\s+muscular\s+\d+/\d+",
+        r"fuerza\s+de\s+garra\s+solo\s+\d+\s*kg",
+        r"limitación\s+activa\s+a\s+\d+[°º]",
+        r"discinesia\s+escapular",
+        r"atrofia\s+periescapular",
+        r"prácticamente\s+nulo\s+desarrollo\s+de\s+fuerza"
+    ),
+    "contradicciones_internas": (
+        r"no\s+presenta\s+limitación\s+importante.*?limitación\s+activa",
+        r"no\s+impide\s+actividades.*?limitación\s+activa",
+        r"alta\s+médica.*?limitaciones?\s+persistentes",
+        r"recuperación.*?secuelas?\s+permanentes",
+        r"movilidad\s+pasiva.*?activa\s+sigue\s+limitada"
+    ),
+    "terminologia_lpni": (
+        r"lesiones?\s+permanentes?\s+no\s+incapacitantes?",
+        r"LPNI",
+        r"secuelas?\s+no\s+invalidantes?",
+        r"molestias?\s+leves?",
+        r"lesiones?\s+menores?"
+    ),
+    "terminologia_ipp": (
+        r"incapacidad\s+permanente\s+parcial",
+        r"IPP",
+        r"disminución\s+(?:del\s+)?rendimiento.*?33%",
+        r"art\.\s*194\.2\s+LGSS",
+        r"limitación\s+funcional\s+permanente",
+        r"merma\s+funcional.*?33%"
+    ),
+    "evidencia_objetiva": (
+        r"RMN.*?\d{2}\.\d{2}\.\d{4}",
+        r"informe\s+de\s+biomecánica",
+        r"fuerza.*?normal.*?>\d+\s*kg",
+        r"duración\s+del\s+proceso.*?\d+\s*meses?",
+        r"múltiples\s+recaídas?",
+        r"cirugía.*?\d{2}\.\d{2}\.\d{4}"
+    )
+}
+
+
+
+def _compilar_patron(categoria: str, patron: str) -> "re.Pattern":
+    """Compila un patrón de ``_PATRONES_DISCREPANCIAS`` según los flags de su categoría. Los que no
+    llevan flags se pasan a minúsculas (``LPNI``, ``IPP``, ``RMN``...) para que coincidan con el
+    texto en minúsculas; los patrones solo usan escapes en minúscula (``\\s``, ``\\d``, ``\\.``)"""
+    flags = _FLAGS_PATRONES.get(categoria, 0)
+    return re.compile(patron if flags else patron.lower(), flags)
+
+
+# Patrones compilados una sola vez al importar el módulo (mismo orden que _PATRONES_DISCREPANCIAS)
+_PATRONES_COMPILADOS = {
+    categoria: tuple(_compilar_patron(categoria, patron) for patron in patrones)
+    for categoria, patrones in _PATRONES_DISCREPANCIAS.items()
+}
+
+# Texto original de cada patrón compilado, que es el que se informa en las coincidencias
+_TEXTO_PATRON = {
+    compilado: patron
+    for categoria, patrones in _PATRONES_DISCREPANCIAS.items()
+    for compilado, patron in zip(_PATRONES_COMPILADOS[categoria], patrones)
+}
+
+
+# Argumentos jurídicos específicos para casos LPNI vs IPP
+_ARGUMENTOS_JURIDICOS = {
+    "argumentos_favorables_ipp": (
+        "El art. 194.2 LGSS exige para la IPP una disminución ≥33% en el rendimiento normal de la profesión habitual",
+        "La profesión de limpiadora requiere levantar brazos repetidamente por encima del hombro",
+        "Con limitación activa que no supera los 90° de abducción/flexión, la merma funcional es objetiva y superior al 33%",
+        "Los informes técnicos confirman que la limitación es permanente y relevante",
+        "La diferencia entre movilidad pasiva y activa es signo clásico de lesión incapacitante para tareas laborales"
+    ),
+    "discrepancias_clave": (
+        "Diagnóstico vs. calificación final: Los informes técnicos describen lesiones graves y limitantes, sin embargo, la calificación final fue de LPNI",
+        "Movilidad pasiva vs. activa: Aunque la pasiva es 'casi completa', lo que importa en el trabajo es la activa, que sigue limitada",
+        "Alta contradictoria: Se reconoce discinesia escapular, atrofia periescapular y limitación activa persistente, pero se concluye que 'no hay limitación laboral'",
+        "Duración y recaídas: Tras casi dos años de tratamiento, operación y rehabilitación, la persistencia de limitaciones descarta una simple lesión no invalidante"
+    ),
+    "puntos_clave_defensa": (
+        "Lesión estructural grave confirmada por RMN: rotura completa del supraespinoso con retracción fibrilar",
+        "Cirugía con anclajes: El hecho de necesitar cirugía reconstructiva marca la gravedad y permanencia del daño",
+        "Limitaciones persistentes postquirúrgicas: flexión activa limitada, fuerza insuficiente para vencer la gravedad",
+        "Informe de biomecánica: 'Prácticamente nulo desarrollo de fuerza con hombro derecho'",
+        "Duración del proceso: 20 meses con múltiples recaídas, cirugía y secuelas"
+    )
+}
+
+
+# Criterios específicos para determinar IPP
+_CRITERIOS_IPP = {
+    "criterio_principal": {
+        "descripcion": "Art. 194.2 LGSS: Disminución ≥33% en el rendimiento normal de la profesión habitual",
+        "elementos": [
+            "Profesión habitual identificada",
+            "Rendimiento normal de referencia",
+            "Disminución cuantificable ≥33%",
+            "Limitación permanente"
+        ]
+    },
+    "profesiones_especificas": {
+        "limpiadora": {
+            "requisitos_funcionales": [
+                "Levantar brazos repetidamente por encima del hombro",
+                "Esfuerzo de hombros",
+                "Escaleras y movimientos repetitivos",
+                "Cargar peso",
+                "Movimientos de limpieza de cristales"
+            ],
+            "limitaciones_criticas": [
+                "Abducción/flexión activa <90°",
+                "Fuerza <50% de lo normal",
+                "Dolor persistente en movimientos",
+                "Discinesia escapular",
+                "Atrofia muscular"
+            ]
+        }
+    },
+    "evidencia_medica_requerida": [
+        "Informes de imagen (RMN, TAC)",
+        "Informes de biomecánica",
+        "Evaluaciones de fuerza muscular",
+        "Seguimiento postquirúrgico",
+        "Evaluaciones de capacidad funcional"
+    ]
+}
+
+
+class CoincidenciaPatron(NamedTuple):
+    """Coincidencia de un patrón de discrepancia en el texto.
+    
+    ``_buscar_patrones`` devuelve estas tuplas (mucho más ligeras que un dict por coincidencia);
+    solo las que pasan al resultado se convierten a dict, y es entonces cuando se recorta su contexto.
+    """
+    patron: str
+    texto: str
+    posicion: int
+    fin: int
+
 
 class AnalizadorDiscrepancias:
     """
@@ -23,136 +225,38 @@ class AnalizadorDiscrepancias:
     def __init__(self):
         """Inicializa el analizador de discrepancias"""
         self.patrones_discrepancias = self._cargar_patrones_discrepancias()
+        # Patrones compilados (a nivel de módulo) por categoría, en el mismo orden que patrones_discrepancias
+        self.patrones_compilados = _PATRONES_COMPILADOS
         self.argumentos_juridicos = self._cargar_argumentos_juridicos()
         self.criterios_ipp = self._cargar_criterios_ipp()
+        # Análisis específico por tipo de documento (cualquier otro tipo usa el genérico)
+        self._analisis_por_tipo = {
+            "sentencia": ("⚖️ Ejecutando análisis específico para SENTENCIA", self._analizar_sentencia),
+            "informe_medico": ("🏥 Ejecutando análisis específico para INFORME MÉDICO", self._analizar_informe_medico)
+        }
+        self._analisis_generico = ("📄 Ejecutando análisis genérico", self._analizar_documento_generico)
         
-    def _cargar_patrones_discrepancias(self) -> Dict[str, List[str]]:
+    def _cargar_patrones_discrepancias(self) -> Dict[str, Tuple[str, ...]]:
         """Carga patrones para detectar discrepancias médicas-legales"""
-        return {
-            "lesiones_graves": [
-                r"rotura\s+(?:de\s+)?espesor\s+completo",
-                r"retracción\s+fibrilar\s+\d+\s*mm",
-                r"tenopatía\s+severa",
-                r"artropatía\s+acromioclavicular\s+severa",
-                r"lesión\s+estructural\s+grave",
-                r"rotura\s+completa\s+del\s+manguito\s+rotador",
-                r"anclajes?\s+(?:corkscrew|tornillos?)",
-                r"cirugía\s+reconstructiva"
-            ],
-            "limitaciones_funcionales": [
-                r"flexión\s+activa\s+solo\s+\d+[°º]",
-                r"abducción\s+activa\s+\d+[°º]",
-                r"fuerza\s+insuficiente\s+para\s+vencer\s+la\s+gravedad",
-                r"balance\s+muscular\s+\d+/\d+",
-                r"fuerza\s+de\s+garra\s+solo\s+\d+\s*kg",
-                r"limitación\s+activa\s+a\s+\d+[°º]",
-                r"discinesia\s+escapular",
-                r"atrofia\s+periescapular",
-                r"prácticamente\s+nulo\s+desarrollo\s+de\s+fuerza"
-            ],
-            "contradicciones_internas": [
-                r"no\s+presenta\s+limitación\s+importante.*?limitación\s+activa",
-                r"no\s+impide\s+actividades.*?limitación\s+activa",
-                r"alta\s+médica.*?limitaciones?\s+persistentes",
-                r"recuperación.*?secuelas?\s+permanentes",
-                r"movilidad\s+pasiva.*?activa\s+sigue\s+limitada"
-            ],
-            "terminologia_lpni": [
-                r"lesiones?\s+permanentes?\s+no\s+incapacitantes?",
-                r"LPNI",
-                r"secuelas?\s+no\s+invalidantes?",
-                r"molestias?\s+leves?",
-                r"lesiones?\s+menores?"
-            ],
-            "terminologia_ipp": [
-                r"incapacidad\s+permanente\s+parcial",
-                r"IPP",
-                r"disminución\s+(?:del\s+)?rendimiento.*?33%",
-                r"art\.\s*194\.2\s+LGSS",
-                r"limitación\s+funcional\s+permanente",
-                r"merma\s+funcional.*?33%"
-            ],
-            "evidencia_objetiva": [
-                r"RMN.*?\d{2}\.\d{2}\.\d{4}",
-                r"informe\s+de\s+biomecánica",
-                r"fuerza.*?normal.*?>\d+\s*kg",
-                r"duración\s+del\s+proceso.*?\d+\s*meses?",
-                r"múltiples\s+recaídas?",
-                r"cirugía.*?\d{2}\.\d{2}\.\d{4}"
-            ]
-        }
+        return _PATRONES_DISCREPANCIAS
     
-    def _cargar_argumentos_juridicos(self) -> Dict[str, List[str]]:
+    def _cargar_argumentos_juridicos(self) -> Dict[str, Tuple[str, ...]]:
         """Carga argumentos jurídicos específicos para casos LPNI vs IPP"""
-        return {
-            "argumentos_favorables_ipp": [
-                "El art. 194.2 LGSS exige para la IPP una disminución ≥33% en el rendimiento normal de la profesión habitual",
-                "La profesión de limpiadora requiere levantar brazos repetidamente por encima del hombro",
-                "Con limitación activa que no supera los 90° de abducción/flexión, la merma funcional es objetiva y superior al 33%",
-                "Los informes técnicos confirman que la limitación es permanente y relevante",
-                "La diferencia entre movilidad pasiva y activa es signo clásico de lesión incapacitante para tareas laborales"
-            ],
-            "discrepancias_clave": [
-                "Diagnóstico vs. calificación final: Los informes técnicos describen lesiones graves y limitantes, sin embargo, la calificación final fue de LPNI",
-                "Movilidad pasiva vs. activa: Aunque la pasiva es 'casi completa', lo que importa en el trabajo es la activa, que sigue limitada",
-                "Alta contradictoria: Se reconoce discinesia escapular, atrofia periescapular y limitación activa persistente, pero se concluye que 'no hay limitación laboral'",
-                "Duración y recaídas: Tras casi dos años de tratamiento, operación y rehabilitación, la persistencia de limitaciones descarta una simple lesión no invalidante"
-            ],
-            "puntos_clave_defensa": [
-                "Lesión estructural grave confirmada por RMN: rotura completa del supraespinoso con retracción fibrilar",
-                "Cirugía con anclajes: El hecho de necesitar cirugía reconstructiva marca la gravedad y permanencia del daño",
-                "Limitaciones persistentes postquirúrgicas: flexión activa limitada, fuerza insuficiente para vencer la gravedad",
-                "Informe de biomecánica: 'Prácticamente nulo desarrollo de fuerza con hombro derecho'",
-                "Duración del proceso: 20 meses con múltiples recaídas, cirugía y secuelas"
-            ]
-        }
+        return _ARGUMENTOS_JURIDICOS
     
     def _cargar_criterios_ipp(self) -> Dict[str, Any]:
         """Carga criterios específicos para determinar IPP"""
-        return {
-            "criterio_principal": {
-                "descripcion": "Art. 194.2 LGSS: Disminución ≥33% en el rendimiento normal de la profesión habitual",
-                "elementos": [
-                    "Profesión habitual identificada",
-                    "Rendimiento normal de referencia",
-                    "Disminución cuantificable ≥33%",
-                    "Limitación permanente"
-                ]
-            },
-            "profesiones_especificas": {
-                "limpiadora": {
-                    "requisitos_funcionales": [
-                        "Levantar brazos repetidamente por encima del hombro",
-                        "Esfuerzo de hombros",
-                        "Escaleras y movimientos repetitivos",
-                        "Cargar peso",
-                        "Movimientos de limpieza de cristales"
-                    ],
-                    "limitaciones_criticas": [
-                        "Abducción/flexión activa <90°",
-                        "Fuerza <50% de lo normal",
-                        "Dolor persistente en movimientos",
-                        "Discinesia escapular",
-                        "Atrofia muscular"
-                    ]
-                }
-            },
-            "evidencia_medica_requerida": [
-                "Informes de imagen (RMN, TAC)",
-                "Informes de biomecánica",
-                "Evaluaciones de fuerza muscular",
-                "Seguimiento postquirúrgico",
-                "Evaluaciones de capacidad funcional"
-            ]
-        }
+        return _CRITERIOS_IPP
     
-    def analizar_discrepancias(self, texto: str, nombre_archivo: str = None) -> Dict[str, Any]:
+    def analizar_discrepancias(self, texto: str, nombre_archivo: str = None,
+                               texto_lower: Optional[str] = None) -> Dict[str, Any]:
         """
         Analiza discrepancias médicas-legales en el texto
         
         Args:
             texto: Texto del informe médico-legal
             nombre_archivo: Nombre del archivo para detección de tipo
+            texto_lower: ``texto.lower()`` si quien llama ya lo tiene (si no, se calcula aquí)
             
         Returns:
             Diccionario con análisis de discrepancias
@@ -180,15 +284,12 @@ class AnalizadorDiscrepancias:
             }
             
             # Análisis específico según tipo de documento
-            if tipo_documento == "sentencia":
-                logger.info("⚖️ Ejecutando análisis específico para SENTENCIA")
-                return self._analizar_sentencia(texto, resultado)
-            elif tipo_documento == "informe_medico":
-                logger.info("🏥 Ejecutando análisis específico para INFORME MÉDICO")
-                return self._analizar_informe_medico(texto, resultado)
-            else:
-                logger.info("📄 Ejecutando análisis genérico")
-                return self._analizar_documento_generico(texto, resultado)
+            mensaje, analizar = self._analisis_por_tipo.get(tipo_documento, self._analisis_generico)
+            logger.info(mensaje)
+            # Texto en minúsculas calculado una sola vez para todos los detectores de este análisis
+            if texto_lower is None:
+                texto_lower = texto.lower()
+            return analizar(texto, resultado, texto_lower)
             
         except Exception as e:
             logger.error(f"Error analizando discrepancias: {e}")
@@ -215,22 +316,11 @@ class AnalizadorDiscrepancias:
         """Detecta el tipo de documento basado en su contenido"""
         texto_lower = texto.lower()
         
-        # Indicadores de sentencia
-        indicadores_sentencia = [
-            "tribunal supremo", "sts", "sentencia", "magistrado", "magistrada",
-            "fallamos", "estimamos", "desestimamos", "resuelvo", "resolvemos",
-            "parte dispositiva", "fundamentos de derecho", "antecedentes de hecho"
-        ]
-        
-        # Indicadores de informe médico
-        indicadores_informe = [
-            "informe médico", "diagnóstico", "tratamiento", "evolución", "pronóstico",
-            "exploración física", "pruebas complementarias", "alta médica", "baja médica",
-            "limitaciones funcionales", "capacidad laboral"
-        ]
-        
-        contador_sentencia = sum(1 for indicador in indicadores_sentencia if indicador in texto_lower)
-        contador_informe = sum(1 for indicador in indicadores_informe if indicador in texto_lower)
+        # Presencia de cada indicador: ``in`` usa la búsqueda de subcadenas en C y se detiene en la
+        # primera aparición (una alternación recorrería el texto entero y perdería los indicadores
+        # contenidos en otros, como "estimamos" dentro de "desestimamos")
+        contador_sentencia = sum(1 for indicador in _INDICADORES_SENTENCIA if indicador in texto_lower)
+        contador_informe = sum(1 for indicador in _INDICADORES_INFORME if indicador in texto_lower)
         
         if contador_sentencia > contador_informe and contador_sentencia >= 3:
             return "sentencia"
@@ -239,17 +329,22 @@ class AnalizadorDiscrepancias:
         else:
             return "documento_generico"
     
-    def _analizar_sentencia(self, texto: str, resultado: Dict[str, Any]) -> Dict[str, Any]:
+    def _analizar_sentencia(self, texto: str, resultado: Dict[str, Any],
+                            texto_lower: Optional[str] = None) -> Dict[str, Any]:
         """Análisis específico para sentencias"""
+        if texto_lower is None:
+            texto_lower = texto.lower()
+        palabras = _palabras_clave_presentes(texto_lower)
+        
         # Análisis específico para sentencias
-        discrepancias = self._detectar_discrepancias_sentencia(texto)
+        discrepancias = self._detectar_discrepancias_sentencia(texto, palabras)
         resultado["discrepancias_detectadas"] = discrepancias
         
-        evidencia = self._analizar_evidencia_sentencia(texto)
+        evidencia = self._analizar_evidencia_sentencia(texto, palabras)
         resultado["evidencia_favorable"] = evidencia
         
         # Detectar contradicciones internas
-        contradicciones = self._detectar_contradicciones_sentencia(texto)
+        contradicciones = self._detectar_contradicciones_sentencia(texto, palabras)
         resultado["contradicciones_internas"] = contradicciones
         
         # Generar argumentos jurídicos específicos para sentencias
@@ -265,7 +360,7 @@ class AnalizadorDiscrepancias:
         resultado["puntuacion_discrepancia"] = puntuacion
         
         # Calcular probabilidad específica para sentencias
-        probabilidad = self._calcular_probabilidad_sentencia(texto, discrepancias, evidencia)
+        probabilidad = self._calcular_probabilidad_sentencia(texto, discrepancias, evidencia, palabras)
         resultado["probabilidad_ipp"] = probabilidad
         
         # Generar resumen específico para sentencias
@@ -279,14 +374,17 @@ class AnalizadorDiscrepancias:
         
         return resultado
     
-    def _analizar_informe_medico(self, texto: str, resultado: Dict[str, Any]) -> Dict[str, Any]:
+    def _analizar_informe_medico(self, texto: str, resultado: Dict[str, Any],
+                                 texto_lower: Optional[str] = None) -> Dict[str, Any]:
         """Análisis específico para informes médicos"""
+        if texto_lower is None:
+            texto_lower = texto.lower()
         # Detectar discrepancias específicas
-        discrepancias = self._detectar_discrepancias_especificas(texto)
+        discrepancias = self._detectar_discrepancias_especificas(texto, texto_lower)
         resultado["discrepancias_detectadas"] = discrepancias
         
         # Analizar evidencia favorable
-        evidencia = self._analizar_evidencia_favorable(texto)
+        evidencia = self._analizar_evidencia_favorable(texto, texto_lower)
         resultado["evidencia_favorable"] = evidencia
         
         # Detectar contradicciones internas
@@ -318,13 +416,16 @@ class AnalizadorDiscrepancias:
         
         return resultado
     
-    def _analizar_documento_generico(self, texto: str, resultado: Dict[str, Any]) -> Dict[str, Any]:
+    def _analizar_documento_generico(self, texto: str, resultado: Dict[str, Any],
+                                    texto_lower: Optional[str] = None) -> Dict[str, Any]:
         """Análisis para documentos genéricos"""
+        if texto_lower is None:
+            texto_lower = texto.lower()
         # Usar análisis básico de discrepancias
-        discrepancias = self._detectar_discrepancias_especificas(texto)
+        discrepancias = self._detectar_discrepancias_especificas(texto, texto_lower)
         resultado["discrepancias_detectadas"] = discrepancias
         
-        evidencia = self._analizar_evidencia_favorable(texto)
+        evidencia = self._analizar_evidencia_favorable(texto, texto_lower)
         resultado["evidencia_favorable"] = evidencia
         
         contradicciones = self._detectar_contradicciones_internas(texto)
@@ -350,48 +451,50 @@ class AnalizadorDiscrepancias:
         
         return resultado
     
-    def _detectar_discrepancias_especificas(self, texto: str) -> List[Dict[str, Any]]:
+    def _detectar_discrepancias_especificas(self, texto: str,
+                                            texto_lower: Optional[str] = None) -> List[Dict[str, Any]]:
         """Detecta discrepancias específicas entre diagnóstico médico y calificación legal"""
         discrepancias = []
-        texto_lower = texto.lower()
+        if texto_lower is None:
+            texto_lower = texto.lower()
         
         # Detectar lesiones graves vs calificación LPNI
-        lesiones_graves = self._buscar_patrones(texto, self.patrones_discrepancias["lesiones_graves"])
-        terminologia_lpni = self._buscar_patrones(texto, self.patrones_discrepancias["terminologia_lpni"])
+        lesiones_graves = self._buscar_patrones(texto, self.patrones_compilados["lesiones_graves"], texto_lower)
+        terminologia_lpni = self._buscar_patrones(texto, self.patrones_compilados["terminologia_lpni"], texto_lower)
         
         if lesiones_graves and terminologia_lpni:
             discrepancias.append({
                 "tipo": "lesiones_graves_vs_lpni",
                 "descripcion": "Se detectan lesiones graves (rotura completa, cirugía reconstructiva) pero se califica como LPNI",
-                "evidencia": lesiones_graves,
-                "contradiccion": terminologia_lpni,
+                "evidencia": self._coincidencias_como_dict(texto, lesiones_graves),
+                "contradiccion": self._coincidencias_como_dict(texto, terminologia_lpni),
                 "severidad": "alta",
                 "argumento_juridico": "Una rotura completa del supraespinoso con cirugía reconstructiva no puede ser calificada como LPNI"
             })
         
         # Detectar limitaciones funcionales vs alta médica
-        limitaciones = self._buscar_patrones(texto, self.patrones_discrepancias["limitaciones_funcionales"])
-        alta_medica = re.search(r"alta\s+médica.*?(?:no\s+presenta\s+limitación|no\s+impide)", texto_lower)
+        limitaciones = self._buscar_patrones(texto, self.patrones_compilados["limitaciones_funcionales"], texto_lower)
+        alta_medica = _RE_ALTA_MEDICA.search(texto_lower)
         
         if limitaciones and alta_medica:
             discrepancias.append({
                 "tipo": "limitaciones_vs_alta",
                 "descripcion": "Se documentan limitaciones funcionales específicas pero se da alta médica sin limitaciones",
-                "evidencia": limitaciones,
+                "evidencia": self._coincidencias_como_dict(texto, limitaciones),
                 "contradiccion": alta_medica.group() if alta_medica else "Alta médica sin limitaciones",
                 "severidad": "alta",
                 "argumento_juridico": "Las limitaciones activas documentadas contradicen la conclusión de alta sin limitaciones"
             })
         
         # Detectar evidencia objetiva vs conclusión subjetiva
-        evidencia_obj = self._buscar_patrones(texto, self.patrones_discrepancias["evidencia_objetiva"])
-        conclusion_subjetiva = re.search(r"(?:molestias?|dolor\s+leve|síntomas?\s+menores?)", texto_lower)
+        evidencia_obj = self._buscar_patrones(texto, self.patrones_compilados["evidencia_objetiva"], texto_lower)
+        conclusion_subjetiva = _RE_CONCLUSION_SUBJETIVA.search(texto_lower)
         
         if evidencia_obj and conclusion_subjetiva:
             discrepancias.append({
                 "tipo": "evidencia_vs_conclusion",
                 "descripcion": "Evidencia objetiva de lesiones graves contradice conclusión de síntomas menores",
-                "evidencia": evidencia_obj,
+                "evidencia": self._coincidencias_como_dict(texto, evidencia_obj),
                 "contradiccion": conclusion_subjetiva.group() if conclusion_subjetiva else "Conclusión de síntomas menores",
                 "severidad": "media",
                 "argumento_juridico": "La evidencia objetiva (RMN, biomecánica) debe prevalecer sobre conclusiones subjetivas"
@@ -399,35 +502,37 @@ class AnalizadorDiscrepancias:
         
         return discrepancias
     
-    def _analizar_evidencia_favorable(self, texto: str) -> List[Dict[str, Any]]:
+    def _analizar_evidencia_favorable(self, texto: str,
+                                      texto_lower: Optional[str] = None) -> List[Dict[str, Any]]:
         """Analiza evidencia médica favorable para IPP"""
         evidencia = []
-        texto_lower = texto.lower()
+        if texto_lower is None:
+            texto_lower = texto.lower()
         
         # Evidencia de lesiones estructurales graves
-        lesiones_graves = self._buscar_patrones(texto, self.patrones_discrepancias["lesiones_graves"])
+        lesiones_graves = self._buscar_patrones(texto, self.patrones_compilados["lesiones_graves"], texto_lower)
         for lesion in lesiones_graves:
             evidencia.append({
                 "tipo": "lesion_estructural_grave",
-                "descripcion": f"Lesión estructural grave confirmada: {lesion['texto']}",
+                "descripcion": f"Lesión estructural grave confirmada: {lesion.texto}",
                 "relevancia": "alta",
                 "argumento": "Las lesiones estructurales graves son incompatibles con LPNI",
-                "posicion": lesion.get('posicion', 0)
+                "posicion": lesion.posicion
             })
         
         # Evidencia de limitaciones funcionales objetivas
-        limitaciones = self._buscar_patrones(texto, self.patrones_discrepancias["limitaciones_funcionales"])
+        limitaciones = self._buscar_patrones(texto, self.patrones_compilados["limitaciones_funcionales"], texto_lower)
         for limitacion in limitaciones:
             evidencia.append({
                 "tipo": "limitacion_funcional_objetiva",
-                "descripcion": f"Limitación funcional objetiva: {limitacion['texto']}",
+                "descripcion": f"Limitación funcional objetiva: {limitacion.texto}",
                 "relevancia": "alta",
                 "argumento": "Las limitaciones funcionales objetivas indican incapacidad para el trabajo",
-                "posicion": limitacion.get('posicion', 0)
+                "posicion": limitacion.posicion
             })
         
         # Evidencia de duración prolongada
-        duracion = re.search(r"(?:durante\s+)?(\d+)\s*(?:meses?|años?)", texto_lower)
+        duracion = _RE_DURACION.search(texto_lower)
         if duracion:
             meses = int(duracion.group(1))
             if meses >= 12:  # Más de un año
@@ -445,8 +550,8 @@ class AnalizadorDiscrepancias:
         """Detecta contradicciones internas en el informe"""
         contradicciones = []
         
-        for patron in self.patrones_discrepancias["contradicciones_internas"]:
-            matches = re.finditer(patron, texto, re.IGNORECASE | re.DOTALL)
+        for patron in self.patrones_compilados["contradicciones_internas"]:
+            matches = patron.finditer(texto)
             for match in matches:
                 contradicciones.append({
                     "tipo": "contradiccion_interna",
@@ -524,13 +629,16 @@ class AnalizadorDiscrepancias:
                 "prioridad": "alta"
             })
         
-        # Recomendaciones específicas solo por tipo de evidencia encontrada
-        tipos_evidencia = set(e["tipo"] for e in evidencia)
-        if "lesion_estructural_grave" in tipos_evidencia:
+        # Recomendaciones específicas solo por tipo de evidencia encontrada (agrupada en una pasada)
+        evidencia_por_tipo = defaultdict(list)
+        for e in evidencia:
+            evidencia_por_tipo[e["tipo"]].append(e)
+        
+        if evidencia_por_tipo["lesion_estructural_grave"]:
             recomendaciones.append({
                 "tipo": "recomendacion_especifica",
                 "titulo": "Utilizar evidencia de lesiones estructurales graves",
-                "contenido": f"Las lesiones estructurales graves documentadas ({len([e for e in evidencia if e['tipo'] == 'lesion_estructural_grave'])}) son incompatibles con LPNI",
+                "contenido": f"Las lesiones estructurales graves documentadas ({len(evidencia_por_tipo['lesion_estructural_grave'])}) son incompatibles con LPNI",
                 "acciones": [
                     "Presentar informes de imagen (RMN) como prueba objetiva",
                     "Argumentar que las lesiones estructurales requieren cirugía reconstructiva",
@@ -539,11 +647,11 @@ class AnalizadorDiscrepancias:
                 "prioridad": "alta"
             })
         
-        if "limitacion_funcional_objetiva" in tipos_evidencia:
+        if evidencia_por_tipo["limitacion_funcional_objetiva"]:
             recomendaciones.append({
                 "tipo": "recomendacion_especifica",
                 "titulo": "Enfatizar limitaciones funcionales objetivas",
-                "contenido": f"Las {len([e for e in evidencia if e['tipo'] == 'limitacion_funcional_objetiva'])} limitaciones funcionales objetivas documentadas demuestran incapacidad",
+                "contenido": f"Las {len(evidencia_por_tipo['limitacion_funcional_objetiva'])} limitaciones funcionales objetivas documentadas demuestran incapacidad",
                 "acciones": [
                     "Presentar informes de biomecánica como prueba objetiva",
                     "Demostrar que las limitaciones activas impiden el trabajo",
@@ -571,25 +679,11 @@ class AnalizadorDiscrepancias:
     
     def _calcular_puntuacion_discrepancia(self, discrepancias: List[Dict], evidencia: List[Dict], contradicciones: List[Dict]) -> int:
         """Calcula una puntuación de discrepancia (0-100)"""
-        puntuacion = 0
-        
         # Puntuación por discrepancias
-        for discrepancia in discrepancias:
-            if discrepancia["severidad"] == "alta":
-                puntuacion += 25
-            elif discrepancia["severidad"] == "media":
-                puntuacion += 15
-            else:
-                puntuacion += 10
+        puntuacion = sum(_PUNTOS_SEVERIDAD.get(discrepancia["severidad"], 10) for discrepancia in discrepancias)
         
         # Puntuación por evidencia favorable
-        for ev in evidencia:
-            if ev["relevancia"] == "alta":
-                puntuacion += 15
-            elif ev["relevancia"] == "media":
-                puntuacion += 10
-            else:
-                puntuacion += 5
+        puntuacion += sum(_PUNTOS_RELEVANCIA.get(ev["relevancia"], 5) for ev in evidencia)
         
         # Puntuación por contradicciones
         puntuacion += len(contradicciones) * 10
@@ -609,7 +703,7 @@ class AnalizadorDiscrepancias:
             probabilidad += min(0.4, len(discrepancias) * 0.1)
         
         # Incremento por tipos específicos de evidencia
-        tipos_evidencia = [e["tipo"] for e in evidencia]
+        tipos_evidencia = {e["tipo"] for e in evidencia}
         if "lesion_estructural_grave" in tipos_evidencia:
             probabilidad += 0.2
         if "limitacion_funcional_objetiva" in tipos_evidencia:
@@ -626,42 +720,47 @@ class AnalizadorDiscrepancias:
         probabilidad = resultado["probabilidad_ipp"]
         puntuacion = resultado["puntuacion_discrepancia"]
         
-        resumen = f"ANÁLISIS DE DISCREPANCIAS MÉDICAS-LEGALES\n\n"
-        resumen += f"📊 RESUMEN EJECUTIVO:\n"
-        resumen += f"• Discrepancias detectadas: {len(discrepancias)}\n"
-        resumen += f"• Evidencia favorable: {len(evidencia)} elementos\n"
-        resumen += f"• Puntuación de discrepancia: {puntuacion}/100\n"
-        resumen += f"• Probabilidad de IPP: {probabilidad:.1%}\n\n"
+        # Fragmentos unidos al final con un solo join
+        partes = [
+            "ANÁLISIS DE DISCREPANCIAS MÉDICAS-LEGALES\n\n",
+            "📊 RESUMEN EJECUTIVO:\n",
+            f"• Discrepancias detectadas: {len(discrepancias)}\n",
+            f"• Evidencia favorable: {len(evidencia)} elementos\n",
+            f"• Puntuación de discrepancia: {puntuacion}/100\n",
+            f"• Probabilidad de IPP: {probabilidad:.1%}\n\n"
+        ]
         
         if probabilidad >= 0.7:
-            resumen += "🎯 CONCLUSIÓN: ALTA PROBABILIDAD DE IPP\n"
-            resumen += "El análisis revela evidencia sólida que respalda la calificación de Incapacidad Permanente Parcial.\n"
+            partes.append("🎯 CONCLUSIÓN: ALTA PROBABILIDAD DE IPP\n")
+            partes.append("El análisis revela evidencia sólida que respalda la calificación de Incapacidad Permanente Parcial.\n")
         elif probabilidad >= 0.5:
-            resumen += "⚠️ CONCLUSIÓN: PROBABILIDAD MEDIA DE IPP\n"
-            resumen += "Se detectan elementos que sugieren IPP, pero se requiere análisis adicional.\n"
+            partes.append("⚠️ CONCLUSIÓN: PROBABILIDAD MEDIA DE IPP\n")
+            partes.append("Se detectan elementos que sugieren IPP, pero se requiere análisis adicional.\n")
         else:
-            resumen += "❌ CONCLUSIÓN: BAJA PROBABILIDAD DE IPP\n"
-            resumen += "La evidencia disponible no respalda claramente la calificación de IPP.\n"
+            partes.append("❌ CONCLUSIÓN: BAJA PROBABILIDAD DE IPP\n")
+            partes.append("La evidencia disponible no respalda claramente la calificación de IPP.\n")
         
         if discrepancias:
-            resumen += f"\n🔍 DISCREPANCIAS PRINCIPALES:\n"
+            partes.append("\n🔍 DISCREPANCIAS PRINCIPALES:\n")
             for i, disc in enumerate(discrepancias[:3], 1):
-                resumen += f"{i}. {disc['descripcion']}\n"
+                partes.append(f"{i}. {disc['descripcion']}\n")
         
         if evidencia:
-            resumen += f"\n✅ EVIDENCIA CLAVE:\n"
+            partes.append("\n✅ EVIDENCIA CLAVE:\n")
             for i, ev in enumerate(evidencia[:3], 1):
-                resumen += f"{i}. {ev['descripcion']}\n"
+                partes.append(f"{i}. {ev['descripcion']}\n")
         
-        return resumen
+        return "".join(partes)
     
-    def _detectar_discrepancias_sentencia(self, texto: str) -> List[Dict[str, Any]]:
+    def _detectar_discrepancias_sentencia(self, texto: str,
+                                      palabras: Optional[FrozenSet[str]] = None) -> List[Dict[str, Any]]:
         """Detecta discrepancias específicas en sentencias"""
         discrepancias = []
-        texto_lower = texto.lower()
+        if palabras is None:
+            palabras = _palabras_clave_presentes(texto.lower())
         
         # Detectar sentencias que hablan de informes médicos
-        if "informe" in texto_lower and ("médico" in texto_lower or "médica" in texto_lower):
+        if "informe" in palabras and ("médico" in palabras or "médica" in palabras):
             discrepancias.append({
                 "tipo": "sentencia_referencia_informe",
                 "descripcion": "La sentencia hace referencia a un informe médico que no está presente en este documento",
@@ -670,7 +769,7 @@ class AnalizadorDiscrepancias:
             })
         
         # Detectar conclusiones sobre IPP vs LPNI
-        if "incapacidad permanente parcial" in texto_lower or "ipp" in texto_lower:
+        if "incapacidad permanente parcial" in palabras or "ipp" in palabras:
             discrepancias.append({
                 "tipo": "conclusion_ipp",
                 "descripcion": "La sentencia contiene conclusiones sobre Incapacidad Permanente Parcial",
@@ -680,13 +779,15 @@ class AnalizadorDiscrepancias:
         
         return discrepancias
     
-    def _analizar_evidencia_sentencia(self, texto: str) -> List[Dict[str, Any]]:
+    def _analizar_evidencia_sentencia(self, texto: str,
+                                  palabras: Optional[FrozenSet[str]] = None) -> List[Dict[str, Any]]:
         """Analiza evidencia específica en sentencias"""
         evidencia = []
-        texto_lower = texto.lower()
+        if palabras is None:
+            palabras = _palabras_clave_presentes(texto.lower())
         
         # Evidencia de fundamentos jurídicos
-        if "artículo" in texto_lower and ("194" in texto or "lgss" in texto_lower):
+        if "artículo" in palabras and ("194" in palabras or "lgss" in palabras):
             evidencia.append({
                 "tipo": "fundamento_legal",
                 "descripcion": "La sentencia contiene fundamentos jurídicos específicos (Art. 194 LGSS)",
@@ -695,7 +796,7 @@ class AnalizadorDiscrepancias:
             })
         
         # Evidencia de lesiones mencionadas
-        if "supraespinoso" in texto_lower or "hombro" in texto_lower:
+        if "supraespinoso" in palabras or "hombro" in palabras:
             evidencia.append({
                 "tipo": "lesion_especifica",
                 "descripcion": "La sentencia menciona lesiones específicas del supraespinoso/hombro",
@@ -705,13 +806,15 @@ class AnalizadorDiscrepancias:
         
         return evidencia
     
-    def _detectar_contradicciones_sentencia(self, texto: str) -> List[Dict[str, Any]]:
+    def _detectar_contradicciones_sentencia(self, texto: str,
+                                        palabras: Optional[FrozenSet[str]] = None) -> List[Dict[str, Any]]:
         """Detecta contradicciones específicas en sentencias"""
         contradicciones = []
-        texto_lower = texto.lower()
+        if palabras is None:
+            palabras = _palabras_clave_presentes(texto.lower())
         
         # Detectar contradicciones entre estimación y desestimación
-        if "estimamos" in texto_lower and "desestimamos" in texto_lower:
+        if "estimamos" in palabras and "desestimamos" in palabras:
             contradicciones.append({
                 "tipo": "contradiccion_estimacion",
                 "descripcion": "La sentencia contiene tanto estimación como desestimación de pretensiones",
@@ -798,13 +901,15 @@ class AnalizadorDiscrepancias:
         
         return min(100, puntuacion)
     
-    def _calcular_probabilidad_sentencia(self, texto: str, discrepancias: List[Dict], evidencia: List[Dict]) -> float:
+    def _calcular_probabilidad_sentencia(self, texto: str, discrepancias: List[Dict], evidencia: List[Dict],
+                                         palabras: Optional[FrozenSet[str]] = None) -> float:
         """Calcula probabilidad específica para sentencias"""
         probabilidad = 0.0
-        texto_lower = texto.lower()
+        if palabras is None:
+            palabras = _palabras_clave_presentes(texto.lower())
         
         # Si la sentencia menciona IPP, alta probabilidad
-        if "incapacidad permanente parcial" in texto_lower or "ipp" in texto_lower:
+        if "incapacidad permanente parcial" in palabras or "ipp" in palabras:
             probabilidad = 0.8
         
         # Ajuste por evidencia
@@ -819,48 +924,61 @@ class AnalizadorDiscrepancias:
         probabilidad = resultado["probabilidad_ipp"]
         puntuacion = resultado["puntuacion_discrepancia"]
         
-        resumen = f"ANÁLISIS DE SENTENCIA JUDICIAL\n\n"
-        resumen += f"📊 RESUMEN EJECUTIVO:\n"
-        resumen += f"• Tipo de documento: Sentencia del Tribunal Supremo\n"
-        resumen += f"• Elementos de evidencia: {len(evidencia)}\n"
-        resumen += f"• Discrepancias detectadas: {len(discrepancias)}\n"
-        resumen += f"• Puntuación de análisis: {puntuacion}/100\n"
-        resumen += f"• Relevancia para IPP: {probabilidad:.1%}\n\n"
+        # Fragmentos unidos al final con un solo join
+        partes = [
+            "ANÁLISIS DE SENTENCIA JUDICIAL\n\n",
+            "📊 RESUMEN EJECUTIVO:\n",
+            "• Tipo de documento: Sentencia del Tribunal Supremo\n",
+            f"• Elementos de evidencia: {len(evidencia)}\n",
+            f"• Discrepancias detectadas: {len(discrepancias)}\n",
+            f"• Puntuación de análisis: {puntuacion}/100\n",
+            f"• Relevancia para IPP: {probabilidad:.1%}\n\n"
+        ]
         
         if probabilidad >= 0.7:
-            resumen += "🎯 CONCLUSIÓN: SENTENCIA RELEVANTE PARA IPP\n"
-            resumen += "La sentencia contiene elementos importantes para casos de IPP.\n"
+            partes.append("🎯 CONCLUSIÓN: SENTENCIA RELEVANTE PARA IPP\n")
+            partes.append("La sentencia contiene elementos importantes para casos de IPP.\n")
         elif probabilidad >= 0.4:
-            resumen += "⚠️ CONCLUSIÓN: SENTENCIA PARCIALMENTE RELEVANTE\n"
-            resumen += "La sentencia contiene algunos elementos útiles para el análisis.\n"
+            partes.append("⚠️ CONCLUSIÓN: SENTENCIA PARCIALMENTE RELEVANTE\n")
+            partes.append("La sentencia contiene algunos elementos útiles para el análisis.\n")
         else:
-            resumen += "ℹ️ CONCLUSIÓN: SENTENCIA DE REFERENCIA\n"
-            resumen += "Esta sentencia puede servir como referencia jurídica.\n"
+            partes.append("ℹ️ CONCLUSIÓN: SENTENCIA DE REFERENCIA\n")
+            partes.append("Esta sentencia puede servir como referencia jurídica.\n")
         
         if evidencia:
-            resumen += f"\n✅ ELEMENTOS CLAVE:\n"
+            partes.append("\n✅ ELEMENTOS CLAVE:\n")
             for i, ev in enumerate(evidencia[:3], 1):
-                resumen += f"{i}. {ev['descripcion']}\n"
+                partes.append(f"{i}. {ev['descripcion']}\n")
         
-        return resumen
+        return "".join(partes)
     
-    def _buscar_patrones(self, texto: str, patrones: List[str]) -> List[Dict[str, Any]]:
-        """Busca patrones específicos en el texto"""
+    def _buscar_patrones(self, texto: str, patrones: Tuple["re.Pattern", ...],
+                         texto_lower: Optional[str] = None) -> List[CoincidenciaPatron]:
+        """Busca patrones específicos (ya compilados) en el texto"""
         resultados = []
-        texto_lower = texto.lower()
+        if texto_lower is None:
+            texto_lower = texto.lower()
         
         for patron in patrones:
-            matches = re.finditer(patron, texto_lower)
-            for match in matches:
-                resultados.append({
-                    "patron": patron,
-                    "texto": texto[match.start():match.end()],
-                    "posicion": match.start(),
-                    "contexto": self._obtener_contexto(texto, match.start(), match.end())
-                })
+            texto_patron = _TEXTO_PATRON.get(patron, patron.pattern)
+            for match in patron.finditer(texto_lower):
+                inicio, fin = match.span()
+                resultados.append(CoincidenciaPatron(texto_patron, texto[inicio:fin], inicio, fin))
         
         return resultados
     
+    def _coincidencias_como_dict(self, texto: str, coincidencias: List[CoincidenciaPatron]) -> List[Dict[str, Any]]:
+        """Coincidencias tal y como aparecen en el resultado, con su contexto recortado de ``texto``"""
+        return [
+            {
+                "patron": coincidencia.patron,
+                "texto": coincidencia.texto,
+                "posicion": coincidencia.posicion,
+                "contexto": self._obtener_contexto(texto, coincidencia.posicion, coincidencia.fin)
+            }
+            for coincidencia in coincidencias
+        ]
+    
     def _obtener_contexto(self, texto: str, start: int, end: int, caracteres: int = 200) -> str:
         """Obtiene contexto alrededor de una coincidencia"""
         context_start = max(0, start - caracteres)
@@ -4,7 +4,7 @@
 Entrenamiento ligero con embeddings de Sentence-Transformers + clasificador.
 
 Modelo por defecto: paraphrase-multilingual-MiniLM-L12-v2 (bueno para ES).
-Genera models/modelo_legal_sbert.pkl con: encoder_name, clasificador, threshold.
+Genera models/modelo_legal_sbert.pkl (y su copia .joblib) con: encoder_name, clasificador, threshold.
 """
 
 from __future__ import annotations
@@ -18,6 +18,7 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
 import pickle
+import joblib
 
 from sentence_transformers import SentenceTransformer
 
@@ -171,6 +172,8 @@ def train_and_save(
     
     with open(out_path, "wb") as f:
         pickle.dump(model_data, f)
+    # Copia sin comprimir para joblib.load(mmap_mode="r"): los procesos del analizador comparten los arrays
+    joblib.dump(model_data, out_path.with_suffix(".joblib"))
 
     return {"status": "ok", "path": str(out_path)}
 
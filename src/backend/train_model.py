@@ -8,7 +8,7 @@ sobre los textos disponibles en las carpetas de documentos. Si existe
 "models/labels.json" con etiquetas manuales por archivo, las usa; si no,
 aplica un etiquetado débil por palabras clave.
 
-Salida: models/modelo_legal.pkl con claves: modelo, vectorizador, clasificador
+Salida: models/modelo_legal.pkl (y su copia models/modelo_legal.joblib) con claves: modelo, vectorizador, clasificador
 """
 
 from __future__ import annotations
@@ -25,6 +25,7 @@ from sklearn.linear_model import LogisticRegression
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report
 import pickle
+import joblib
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -189,12 +190,15 @@ def train_and_save(
 
     models_dir.mkdir(parents=True, exist_ok=True)
     out_path = models_dir / "modelo_legal.pkl"
+    modelo_data = {
+        "modelo": "scikit-learn",
+        "vectorizador": vectorizer,
+        "clasificador": clf,
+    }
     with open(out_path, "wb") as f:
-        pickle.dump({
-            "modelo": "scikit-learn",
-            "vectorizador": vectorizer,
-            "clasificador": clf,
-        }, f)
+        pickle.dump(modelo_data, f)
+    # Copia sin comprimir para joblib.load(mmap_mode="r"): los procesos del analizador comparten los arrays
+    joblib.dump(modelo_data, out_path.with_suffix(".joblib"))
 
     return {"status": "ok", "path": str(out_path)}
 
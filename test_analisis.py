@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+"""
+Pruebas del analizador legal (src/backend/analisis.py)
+Fijan el comportamiento observable que cambian las optimizaciones del analizador
+"""
+
+import pickle
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+
+import pytest
+
+from src.backend import analisis
+from src.backend.analisis import AnalizadorLegal, Argumento, obtener_contexto
+
+
+@pytest.fixture
+def analizador_reglas(tmp_path):
+    """Analizador sin modelo entrenado: siempre usa el análisis basado en reglas"""
+    analizador = AnalizadorLegal(modelo_path=str(tmp_path / "sin_modelo.pkl"))
+    analizador.modelo = None
+    analizador.sbert_encoder = None
+    analizador.sbert_clf = None
+    return analizador
+
+
+def test_contexto_marca_solo_la_coincidencia(analizador_reglas):
+    """En el contexto de cada ocurrencia se marca solo la frase encontrada"""
+    texto = "Primero estimamos el recurso y después estimamos la demanda."
+    primera = texto.index("estimamos")
+    segunda = texto.index("estimamos", primera + 1)
+
+    frases = analizador_reglas._analizar_frases_clave_por_tipo(
+        texto, "STS_1.txt", "sentencia"
+    )
+    ocurrencias = frases["conclusiones_judiciales"]["ocurrencias"]
+
+    assert [o["posicion"] for o in ocurrencias] == [primera, segunda]
+    assert ocurrencias[0]["contexto"] == (
+        "Primero **estimamos** el recurso y después estimamos la demanda."
+    )
+    assert ocurrencias[1]["contexto"] == (
+        "Primero estimamos el recurso y después **estimamos** la demanda."
+    )
+
+
+def test_prediccion_por_reglas_cuenta_cada_termino_una_vez(analizador_reglas):
+    """Los términos repetidos en el vocabulario (estimamos...) cuentan una sola vez"""
+    texto = "Estimamos lo solicitado; está acreditado. La oposición es insuficiente."
+    prediccion = analizador_reglas._prediccion_basada_reglas(texto)
+    palabras = prediccion["factores_analisis"]["palabras_clave"]
+
+    assert palabras["favorables"] == 2
+    assert palabras["desfavorables"] == 1
+    assert palabras["score"] == round(1 / 3, 3)
+
+
+def test_prediccion_por_reglas_cuenta_palabras_completas(analizador_reglas):
+    """Los términos de una palabra solo cuentan como palabra completa"""
+    texto = (
+        "El tribunal deniega la prestación. "
+        "Se invocan los derechos y el factor humano."
+    )
+    factores = analizador_reglas._prediccion_basada_reglas(texto)["factores_analisis"]
+
+    assert factores["palabras_clave"]["favorables"] == 0
+    assert factores["palabras_clave"]["desfavorables"] == 1
+    # "hechos" no aparece dentro de "derechos" ni "actor" dentro de "factor"
+    assert factores["estructura"]["elementos_detectados"] == []
+    assert factores["terminologia"]["elementos_detectados"] == []
+
+    # "procedente" ya no cuenta además como "procede"
+    texto = "Es procedente la demanda."
+    factores = analizador_reglas._prediccion_basada_reglas(texto)["factores_analisis"]
+    palabras = factores["palabras_clave"]
+    assert palabras["favorables"] == 1
+    assert palabras["score"] == 1.0
+
+
+def test_leer_archivo_txt_normaliza_saltos_de_linea(analizador_reglas, tmp_path):
+    """Los .txt se decodifican en memoria igual que con la lectura en modo texto"""
+    ruta = tmp_path / "sentencia.txt"
+    contenido = "  FALLO\r\nEstimamos el recurso.\rSe reconoce la incapacidad.\n\n"
+    ruta.write_bytes(contenido.encode("utf-8"))
+
+    assert analizador_reglas._leer_archivo(str(ruta)) == (
+        "FALLO\nEstimamos el recurso.\nSe reconoce la incapacidad."
+    )
+
+
+_TEXTOS_LOTE = [
+    "FALLO. Estimamos el recurso y se reconoce la incapacidad permanente parcial.",
+    "Desestimamos el recurso por lo que se confirma la sentencia de instancia.",
+    "Informe médico: rotura de espesor completo del supraespinoso del hombro derecho.",
+    "Considerando que la trabajadora sufrió un accidente laboral durante la jornada."
+]
+
+
+def _sin_timestamp(resultados):
+    """Resultados sin el timestamp, lo único que cambia entre dos análisis iguales.
+
+    Las "frases" de cada categoría salen de un set, así que su orden depende del hash de
+    cadenas de cada proceso (los procesos "spawn" del pool no comparten la semilla).
+    """
+    normalizados = []
+    for resultado in resultados:
+        resultado = {clave: valor for clave, valor in resultado.items() if clave != "timestamp"}
+        if "frases_clave" in resultado:
+            resultado["frases_clave"] = {
+                categoria: {**datos, "frases": sorted(datos["frases"])}
+                for categoria, datos in resultado["frases_clave"].items()
+            }
+        normalizados.append(resultado)
+    return normalizados
+
+
+def test_analizar_lote_igual_que_analisis_individual(tmp_path):
+    """El lote en paralelo devuelve, en orden, lo mismo que cada análisis suelto"""
+    analizador = AnalizadorLegal(modelo_path=str(tmp_path / "sin_modelo.pkl"))
+    nombres = ["STS_1.txt", "STS_2.txt", "informe_medico.txt", "documento.txt"]
+
+    esperados = [
+        analizador.analizar_texto(texto, nombre)
+        for texto, nombre in zip(_TEXTOS_LOTE, nombres)
+    ]
+    resultados = analizador.analizar_lote(_TEXTOS_LOTE, nombres, max_workers=2)
+
+    assert _sin_timestamp(resultados) == _sin_timestamp(esperados)
+
+
+def test_analizar_documentos_igual_que_analisis_individual(tmp_path):
+    """En paralelo, cada archivo da su resultado (o su error) en su posición"""
+    analizador = AnalizadorLegal(modelo_path=str(tmp_path / "sin_modelo.pkl"))
+    rutas = []
+    for i, texto in enumerate(_TEXTOS_LOTE):
+        ruta = tmp_path / f"STS_{i}.txt"
+        ruta.write_text(texto, encoding="utf-8")
+        rutas.append(str(ruta))
+    rutas.insert(2, str(tmp_path / "no_existe.txt"))
+
+    esperados = [analizador.analizar_documento(ruta) for ruta in rutas]
+    resultados = analizador.analizar_documentos(rutas, max_workers=2)
+
+    assert _sin_timestamp(resultados) == _sin_timestamp(esperados)
+    assert resultados[2]["procesado"] is False
+
+
+def test_lotes_vacios(tmp_path):
+    """Un lote vacío devuelve una lista vacía sin arrancar el pool"""
+    analizador = AnalizadorLegal(modelo_path=str(tmp_path / "sin_modelo.pkl"))
+    assert analizador.analizar_lote([]) == []
+    assert analizador.analizar_documentos([]) == []
+
+
+@pytest.mark.parametrize("error", [
+    BrokenProcessPool("proceso terminado"),
+    pickle.PicklingError("no serializable"),
+    OSError("sin procesos"),
+])
+def test_lote_analiza_secuencialmente_si_falla_el_pool(tmp_path, monkeypatch, error):
+    """Si el pool falla o no puede serializar, el lote se analiza en este proceso"""
+    analizador = AnalizadorLegal(modelo_path=str(tmp_path / "sin_modelo.pkl"))
+
+    class _PoolQueFalla:
+        def __init__(self, *args, **kwargs):
+            pass
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *excepcion):
+            return False
+
+        def map(self, *args, **kwargs):
+            raise error
+
+    esperados = [
+        analizador.analizar_texto(texto, f"documento_{i + 1}.txt")
+        for i, texto in enumerate(_TEXTOS_LOTE)
+    ]
+    monkeypatch.setattr(analisis, "ProcessPoolExecutor", _PoolQueFalla)
+
+    resultados = analizador.analizar_lote(_TEXTOS_LOTE, max_workers=2)
+    assert _sin_timestamp(resultados) == _sin_timestamp(esperados)
+
+
+_ENTRENAMIENTO_IA = [
+    "incapacidad permanente por lesión grave del hombro derecho",
+    "secuelas permanentes acreditadas en el informe médico",
+    "limitación funcional severa y rotura del supraespinoso",
+    "lesiones leves sin secuelas ni limitación funcional",
+    "alta médica completa sin limitación alguna",
+    "no consta lesión ni secuela en el informe",
+]
+
+
+def _cargar_modelo_ia(analizador):
+    """Entrena un TF-IDF + regresión logística mínimo y lo asigna al analizador"""
+    texto_sklearn = pytest.importorskip("sklearn.feature_extraction.text")
+    modelo_lineal = pytest.importorskip("sklearn.linear_model")
+    vectorizador = texto_sklearn.TfidfVectorizer().fit(_ENTRENAMIENTO_IA)
+    clasificador = modelo_lineal.LogisticRegression().fit(
+        vectorizador.transform(_ENTRENAMIENTO_IA), [1, 1, 1, 0, 0, 0]
+    )
+    analizador.modelo = clasificador
+    analizador.vectorizador = vectorizador
+    analizador.clasificador = clasificador
+    return vectorizador, clasificador
+
+
+def test_prediccion_ia_igual_que_predict(analizador_reglas):
+    """La clase más probable de predict_proba coincide con la de predict()"""
+    vectorizador, clasificador = _cargar_modelo_ia(analizador_reglas)
+
+    textos = _ENTRENAMIENTO_IA + ["informe del hombro sin secuelas", "texto sin términos"]
+    for texto in textos:
+        vector = vectorizador.transform([texto])
+        resultado = analizador_reglas._analisis_con_ia(texto, {}, "documento.txt")
+        prediccion = resultado["prediccion"]
+
+        assert prediccion["es_favorable"] == bool(clasificador.predict(vector)[0])
+        assert prediccion["confianza"] == max(clasificador.predict_proba(vector)[0])
+
+
+def test_lote_ia_igual_que_analisis_individual(analizador_reglas):
+    """Las probabilidades del lote llegan a cada texto en su posición, aunque haya textos vacíos"""
+    _cargar_modelo_ia(analizador_reglas)
+    textos = [_ENTRENAMIENTO_IA[0], "", _ENTRENAMIENTO_IA[4], _ENTRENAMIENTO_IA[1]]
+    nombres = [f"documento_{i + 1}.txt" for i in range(len(textos))]
+
+    esperados = [
+        analizador_reglas.analizar_texto(texto, nombre)
+        for texto, nombre in zip(textos, nombres)
+    ]
+    resultados = analizador_reglas._analizar_textos(textos, nombres)
+
+    assert _sin_timestamp(resultados) == _sin_timestamp(esperados)
+    assert [r["prediccion"]["es_favorable"] for r in resultados if r["procesado"]] == [
+        True, False, True
+    ]
+
+
+@pytest.mark.parametrize("codificacion, bom", [
+    ("utf-8", b"\xef\xbb\xbf"),
+    ("utf-16-le", b"\xff\xfe"),
+    ("utf-16-be", b"\xfe\xff"),
+    ("utf-32-le", b"\xff\xfe\x00\x00"),
+])
+def test_leer_txt_con_bom(analizador_reglas, tmp_path, codificacion, bom):
+    """Los .txt con BOM se decodifican con su codec y sin la marca"""
+    texto = "Sentencia nº 12: se estima la incapacidad permanente parcial."
+    ruta = tmp_path / "sentencia.txt"
+    ruta.write_bytes(bom + texto.encode(codificacion))
+
+    assert analizador_reglas._leer_archivo(str(ruta)) == texto
+
+
+def test_leer_txt_sin_bom_en_latin1(analizador_reglas, tmp_path):
+    """Sin BOM se siguen probando utf-8, latin-1 y cp1252"""
+    texto = "Resolución del INSS: lesión de hombro."
+    ruta = tmp_path / "sentencia.txt"
+    ruta.write_bytes(texto.encode("latin-1"))
+
+    assert analizador_reglas._leer_archivo(str(ruta)) == texto
+
+
+def test_argumento_como_dict_no_expone_contexto_rango():
+    """El rango del contexto es interno: el resultado lleva el contexto recortado"""
+    texto = "0123456789" * 10
+    argumento = Argumento(
+        tipo="argumento_legal",
+        texto="argumento de prueba",
+        posicion=40,
+        confianza=0.8,
+        categoria="fundamento_juridico",
+        contexto_rango=(20, 70)
+    )
+
+    assert obtener_contexto(argumento, texto) == texto[20:70]
+    assert argumento.como_dict(texto) == {
+        "tipo": "argumento_legal",
+        "texto": "argumento de prueba",
+        "posicion": 40,
+        "confianza": 0.8,
+        "categoria": "fundamento_juridico",
+        "contexto": texto[20:70]
+    }
+    assert "contexto_rango" not in argumento.como_dict()
+
+
+def test_argumentos_basicos_llevan_contexto_en_el_resultado(analizador_reglas):
+    """El contexto (500 caracteres a cada lado) se recorta al montar el resultado"""
+    argumento = "considerando que la trabajadora sufrió un accidente laboral grave."
+    texto = "a" * 600 + " " + argumento + " " + "b" * 600
+    inicio = texto.index(argumento)
+
+    for detalles in (True, False):
+        resultado = analizador_reglas.analizar_texto(
+            texto, "documento.txt", detalles=detalles
+        )
+        assert resultado["argumentos"] == [{
+            "tipo": "argumento_legal",
+            "texto": "la trabajadora sufrió un accidente laboral grave.",
+            "posicion": inicio,
+            "confianza": 0.8,
+            "categoria": "fundamento_juridico",
+            "contexto": texto[inicio - 500:inicio + len(argumento) + 500]
+        }]
+
+
+class _PaginaPdf:
+    """Página de un lector PyPDF2 simulado"""
+
+    def __init__(self, texto):
+        self.texto = texto
+
+    def extract_text(self):
+        return self.texto
+
+
+def test_leer_pdf_recurre_a_pypdf2_si_pypdfium2_falla(
+    analizador_reglas, tmp_path, monkeypatch
+):
+    """Si pypdfium2 no puede leer el PDF, el texto se extrae con PyPDF2"""
+    ruta = tmp_path / "sentencia.pdf"
+    ruta.write_bytes(b"%PDF-1.4")
+
+    def _pdfium_falla(_ruta):
+        raise RuntimeError("PDF no soportado por PDFium")
+
+    def _lector_pypdf2(_archivo):
+        paginas = [_PaginaPdf("FALLO"), _PaginaPdf(None), _PaginaPdf("Estimamos.")]
+        return SimpleNamespace(pages=paginas)
+
+    monkeypatch.setattr(analisis, "PYPDFIUM2_AVAILABLE", True)
+    monkeypatch.setattr(analisis, "PYPDF2_AVAILABLE", True)
+    monkeypatch.setattr(analisis, "PyPDF2", SimpleNamespace(PdfReader=_lector_pypdf2),
+                        raising=False)
+    monkeypatch.setattr(analizador_reglas, "_leer_pdf_pdfium", _pdfium_falla)
+
+    assert analizador_reglas._leer_pdf(str(ruta)) == ("FALLO\n\nEstimamos.", False)
+
+
+def test_limite_de_caracteres_por_defecto(monkeypatch, tmp_path):
+    """Por defecto se recorta a 500000 caracteres; ANALIZADOR_MAX_CHARS lo cambia"""
+    monkeypatch.delenv("ANALIZADOR_MAX_CHARS", raising=False)
+    analizador = AnalizadorLegal(modelo_path=str(tmp_path / "sin_modelo.pkl"))
+    limitar = analizador._limitar_contenido
+    assert limitar("x" * 500_001, "documento.txt") == ("x" * 500_000, True)
+    assert limitar("x" * 500_000, "documento.txt") == ("x" * 500_000, False)
+
+    monkeypatch.setenv("ANALIZADOR_MAX_CHARS", "0")
+    analizador = AnalizadorLegal(modelo_path=str(tmp_path / "sin_modelo.pkl"))
+    limitar = analizador._limitar_contenido
+    assert limitar("x" * 500_001, "documento.txt") == ("x" * 500_001, False)
+
+
+def test_pdf_con_paginas_sin_leer_se_marca_truncado(
+    analizador_reglas, tmp_path, monkeypatch
+):
+    """Si la lectura se detiene en el límite el resultado es truncado"""
+    ruta = tmp_path / "sentencia.pdf"
+    ruta.write_bytes(b"%PDF-1.4")
+
+    def _lector_pypdf2(_archivo):
+        paginas = [_PaginaPdf("abcd "), _PaginaPdf("efgh "), _PaginaPdf("ijkl")]
+        return SimpleNamespace(pages=paginas)
+
+    monkeypatch.setattr(analisis, "PYPDFIUM2_AVAILABLE", False)
+    monkeypatch.setattr(analisis, "PYPDF2_AVAILABLE", True)
+    monkeypatch.setattr(analisis, "PyPDF2", SimpleNamespace(PdfReader=_lector_pypdf2),
+                        raising=False)
+
+    analizador_reglas.max_caracteres = 10
+    resultado = analizador_reglas.analizar_documento(str(ruta))
+    assert resultado["texto_extraido"] == "abcd \nefgh"
+    assert resultado["truncado"] is True
+
+    analizador_reglas.max_caracteres = 100
+    resultado = analizador_reglas.analizar_documento(str(ruta))
+    assert resultado["texto_extraido"] == "abcd \nefgh \nijkl"
+    assert resultado["truncado"] is False
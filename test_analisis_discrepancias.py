@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Pruebas del analizador de discrepancias (src/backend/analisis_discrepancias.py)
+"""
+
+from src.backend.analisis_discrepancias import AnalizadorDiscrepancias
+
+INFORME = (
+    "Informe médico. Rotura de espesor completo del supraespinoso. "
+    "RMN de 12.03.2021 compatible. Se califica como LPNI. "
+    "Procede IPP según art. 194.2 LGSS."
+)
+
+
+def test_patrones_en_mayusculas_coinciden_sin_distinguir_mayusculas():
+    """LPNI, IPP, RMN y LGSS se detectan aunque el texto se busque en minúsculas; las coincidencias
+    conservan el patrón original y el texto tal y como aparece en el documento"""
+    analizador = AnalizadorDiscrepancias()
+
+    def coincidencias(categoria):
+        return [(c.patron, c.texto, c.posicion)
+                for c in analizador._buscar_patrones(INFORME, analizador.patrones_compilados[categoria])]
+
+    assert coincidencias("terminologia_lpni") == [("LPNI", "LPNI", INFORME.index("LPNI"))]
+    assert coincidencias("terminologia_ipp") == [
+        ("IPP", "IPP", INFORME.index("IPP")),
+        (r"art\.\s*194\.2\s+LGSS", "art. 194.2 LGSS", INFORME.index("art."))
+    ]
+    assert coincidencias("evidencia_objetiva") == [
+        (r"RMN.*?\d{2}\.\d{2}\.\d{4}", "RMN de 12.03.2021", INFORME.index("RMN"))
+    ]
+
+
+def test_lesion_grave_calificada_como_lpni_es_discrepancia():
+    """Un informe con lesión grave calificada como "LPNI" (en mayúsculas) da la discrepancia lesiones_graves_vs_lpni"""
+    resultado = AnalizadorDiscrepancias().analizar_discrepancias(INFORME, "informe_medico.pdf")
+
+    discrepancias = {d["tipo"]: d for d in resultado["discrepancias_detectadas"]}
+    assert "lesiones_graves_vs_lpni" in discrepancias
+    assert [c["texto"] for c in discrepancias["lesiones_graves_vs_lpni"]["contradiccion"]] == ["LPNI"]